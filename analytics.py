@@ -0,0 +1,15 @@
+"""
+Analyses vectorisées (NumPy) sur les colonnes extraites par db_mongo.fetch_columns.
+"""
+import numpy as np
+
+from db_mongo import get_runtime_and_revenue_columns
+
+
+def runtime_revenue_correlation(columns=None):
+    """Coefficient de corrélation de Pearson entre durée et revenu (None si moins de 2 films)."""
+    columns = columns or get_runtime_and_revenue_columns()
+    runtime, revenue = columns["runtime"], columns["revenue"]
+    if len(runtime) < 2:
+        return None
+    return float(np.corrcoef(runtime, revenue)[0, 1])
@@ -0,0 +1,11 @@
+from db_neo4j import Neo4jConnector
+from ensure_indexes import ensure_indexes
+
+# Reconstruction complète de la projection (:Actor)-[:CO_JOUE {count, films}]->(:Actor).
+# À lancer après un export complet ; chaque écriture de relations A_JOUE_DANS la tient ensuite à jour.
+ensure_indexes()
+
+neo4j = Neo4jConnector()
+nb_films = neo4j.build_coactor_relations()
+neo4j.close()
+print(f"Projection CO_JOUE construite à partir de {nb_films} films.")
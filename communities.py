@@ -0,0 +1,76 @@
+"""
+Détection de communautés dans le graphe des co-acteurs.
+
+Les arêtes (acteur1, acteur2) sont lues en flux dans une adjacence creuse CSR (NumPy), puis
+partitionnées par propagation de labels (quasi linéaire en nombre d'arêtes par itération).
+Les communautés sont stockées dans Neo4j (propriété Actor.community) avec la version du graphe
+acteurs-films au moment du calcul (incrémentée par chaque écriture de relations A_JOUE_DANS) :
+elles ne sont recalculées que si le graphe a été modifié depuis, même à nombre de relations égal.
+"""
+import numpy as np
+
+
+def build_adjacency(edges):
+    """Itérable de paires de noms -> (noms, ptr, indices) au format CSR non orienté."""
+    index, names = {}, []
+    src, dst = [], []
+    for a1, a2 in edges:
+        for name in (a1, a2):
+            if name not in index:
+                index[name] = len(names)
+                names.append(name)
+        i, j = index[a1], index[a2]
+        src += (i, j)
+        dst += (j, i)
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int32)
+    order = np.argsort(src, kind="stable")
+    ptr = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=len(names)), out=ptr[1:])
+    return names, ptr, dst[order]
+
+
+def label_propagation(ptr, indices, max_iter=20, seed=0):
+    """
+    Propagation de labels asynchrone : chaque noeud prend le label majoritaire de ses voisins
+    (égalités départagées par le plus petit label) jusqu'à stabilité ou max_iter itérations.
+    Retourne un tableau de labels renumérotés 0..k-1.
+    """
+    n = len(ptr) - 1
+    labels = np.arange(n)
+    rng = np.random.default_rng(seed)
+    for _ in range(max_iter):
+        changed = 0
+        for node in rng.permutation(n):
+            neighbors = indices[ptr[node]:ptr[node + 1]]
+            if len(neighbors) == 0:
+                continue
+            values, counts = np.unique(labels[neighbors], return_counts=True)
+            best = values[np.argmax(counts)]
+            if best != labels[node]:
+                labels[node] = best
+                changed += 1
+        if changed == 0:
+            break
+    return np.unique(labels, return_inverse=True)[1]
+
+
+def detect_actor_communities(connector, force=False):
+    """
+    Retourne {acteur: communauté}. Les communautés stockées sont réutilisées tant que le
+    graphe n'a pas changé ; sinon (ou avec force=True) elles sont recalculées et stockées.
+    """
+    # Version lue avant le calcul : une écriture concurrente déclenchera un nouveau calcul
+    graph_version = connector.get_actor_graph_version()
+    if not force and connector.get_communities_graph_version() == graph_version:
+        communities = connector.get_actor_communities()
+        if communities:
+            return communities
+
+    # Arêtes lues sans cache ni moteur en mémoire : elles correspondent à graph_version
+    names, ptr, indices = build_adjacency(connector.iter_actor_edges())
+    labels = label_propagation(ptr, indices)
+    communities = {name: int(label) for name, label in zip(names, labels)}
+    connector.store_actor_communities(communities, graph_version)
+    print(f"{len(set(communities.values()))} communautés détectées pour {len(names)} acteurs.")
+    return communities
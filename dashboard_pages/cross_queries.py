@@ -0,0 +1,44 @@
+import pandas as pd
+import streamlit as st
+from db_neo4j import Neo4jConnector
+
+##########################################
+# Section Transversales
+##########################################
+
+st.header("Requêtes transversales")
+if st.button("27 - Films avec genres communs mais réalisateurs différents"):
+    connector = Neo4jConnector()
+    films = connector.get_films_with_common_genres_and_different_directors()
+    connector.close()
+    if films:
+        st.dataframe(pd.DataFrame(films))
+    else:
+        st.warning("Aucun résultat trouvé.")
+
+actor_input = st.text_input("Entrez le nom de l'acteur pour la recommandation :", "Anne Hathaway")
+if st.button("28 - Recommander des films à l'acteur"):
+    connector = Neo4jConnector()
+    reco = connector.recommend_films_based_on_actor_preferences(actor_input)
+    connector.close()
+    if reco:
+        st.dataframe(pd.DataFrame(reco))
+    else:
+        st.warning("Aucune recommandation trouvée pour cet acteur.")
+
+if st.button("29 - Créer la relation de concurrence entre réalisateurs"):
+    connector = Neo4jConnector()
+    connector.create_director_competition_relations()
+    connector.close()
+    st.success("La relation CONCURRENCE a été créée entre réalisateurs.")
+
+if st.button("30 - Collaborations fréquentes réalisateur-acteur"):
+    connector = Neo4jConnector()
+    collaborations = connector.get_director_actor_collaborations()
+    connector.close()
+    if collaborations:
+        st.success("Collaborations fréquentes identifiées avec leur succès commercial moyen :")
+        df = pd.DataFrame(collaborations)
+        st.dataframe(df)
+    else:
+        st.warning("Aucune collaboration trouvée.")
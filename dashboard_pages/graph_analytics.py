@@ -0,0 +1,171 @@
+import os
+import streamlit as st
+import streamlit.components.v1 as components
+from db_neo4j import Neo4jConnector
+from graph_engine import get_loaded_graph_engine, load_graph_engine
+from graph_helpers import (
+    draw_actor_communities_graph,
+    draw_actor_highest_revenue_graph,
+    draw_actors_with_common_movies,
+    draw_coactors_films_graph,
+    draw_director_with_actors_graph,
+    draw_film_recommendation_graph,
+    draw_most_common_genre_graph,
+    draw_shared_films_graph_only,
+    draw_shortest_path_between_actors,
+    draw_top_actor_graph,
+    afficher_graphe_acteurs_films,
+    draw_coactors_graph,
+    draw_votes_avg_graph
+)
+
+##########################################
+# Section Neo4j - Requêtes Cypher
+##########################################
+
+# Moteur de graphe en mémoire (optionnel) : chargé une fois par processus si GRAPH_ENGINE_AUTOLOAD=1
+if os.getenv("GRAPH_ENGINE_AUTOLOAD") == "1" and get_loaded_graph_engine() is None:
+    load_graph_engine()
+
+st.header("Neo4j - Visualisation et requêtes sur les graphes (TEST Neo4j)") # Test des graphes
+if st.button("Visualiser graphe acteurs-films"):
+    afficher_graphe_acteurs_films()
+
+if st.button("14 - Top 1 Acteur", key="top_actor_alt"):
+    connector = Neo4jConnector()
+    result = connector.get_top_actor_alt()
+    if result:
+        st.success(f"**{result['acteur']}** a joué dans **{result['nb_films']}** films.")
+        draw_top_actor_graph()
+    else:
+        st.warning("Aucun acteur trouvé.")
+    connector.close()
+    
+if st.button("15 - Voir les co-acteurs d'Anne Hathaway", key="combo_coactors"):
+    connector = Neo4jConnector()
+    coactors = connector.get_coactors_of("Anne Hathaway")
+    connector.close()
+    if coactors:
+        st.success(f"Anne Hathaway a joué avec {len(coactors)} acteur(s) :")
+        for co in coactors:
+            st.markdown(f"- {co}")
+    else:
+        st.warning("Aucun co-acteur trouvé.")
+    draw_coactors_graph("Anne Hathaway")
+
+if st.button("16 - L’acteur ayant joué dans des films totalisant le plus de revenus"):
+    connector = Neo4jConnector()
+    top = connector.get_actor_highest_total_revenue()
+    if top:
+        actor = top["actor"]
+        revenue = round(top["totalRevenue"], 2)
+        st.success(f"**{actor}** a généré un total de **{revenue} M$**.")
+        draw_actor_highest_revenue_graph()
+    else:
+        st.warning("Aucun acteur trouvé.")
+
+if st.button("17 - Moyenne des votes + Graphe"):
+    connector = Neo4jConnector()
+    results = connector.get_votes_per_film()
+    votes = [r["votes"] for r in results if r["votes"] is not None]
+    moyenne = sum(votes) / len(votes) if votes else 0
+    if results:
+        st.success(f"Moyenne des votes (top 10) : **{round(moyenne, 2)}**")
+        image = draw_votes_avg_graph(results, moyenne)
+        st.image(image, caption="Votes par film avec moyenne")
+    else:
+        st.warning("Aucune donnée trouvée.")
+    connector.close()
+
+if st.button("18 - Genre le plus fréquent + Graphe"):
+    connector = Neo4jConnector()
+    genre_info = connector.get_most_common_genre()
+    connector.close()
+    if genre_info:
+        genre = genre_info["genre"]
+        count = genre_info["occurrences"]
+        st.success(f"Le genre le plus fréquent est **{genre}** avec **{count}** films.")
+        components.html(draw_most_common_genre_graph(genre, count), height=600)
+    else:
+        st.warning("Aucun genre trouvé.")
+
+st.header("Films des co-acteurs d'un membre du projet")
+selected_member = st.selectbox("Choisissez un membre", ["Matias", "Pooranan"])
+if st.button("19 - Co-acteurs + leurs films (texte + graphe)"):
+    connector = Neo4jConnector()
+    films = connector.get_films_of_my_coactors(selected_member)
+    connector.close()
+    if films:
+        st.success(f"Films dans lesquels les co-acteurs de **{selected_member}** ont joué :")
+        for film in films:
+            st.markdown(f"- **{film['title']}** ({film['year']})")
+    else:
+        st.warning("Aucun film trouvé pour les co-acteurs.")
+    draw_coactors_films_graph(selected_member)
+
+if st.button("20 - Voir le réalisateur le plus connecté aux acteurs"):
+    connector = Neo4jConnector()
+    result = connector.get_director_with_most_actors()
+    if result:
+        director = result["realisateur"]
+        nb = result["nb_acteurs"]
+        st.success(f"Le réalisateur **{director}** a dirigé **{nb}** acteurs différents.")
+        draw_director_with_actors_graph(director)
+    else:
+        st.warning("Aucun réalisateur trouvé.")
+    connector.close()
+
+if st.button("21 - Films les plus connectés (graphe global)"):
+    connector = Neo4jConnector()
+    films = connector.get_most_connected_films(limit=10)
+    connector.close()
+    if films:
+        st.success("Voici les films les plus connectés aux autres via des acteurs partagés.")
+        draw_shared_films_graph_only(films)
+    else:
+        st.warning("Aucun film connecté trouvé.")
+
+if st.button("22 - Acteurs avec le plus de réalisateurs différents"):
+    connector = Neo4jConnector()
+    acteurs = connector.get_actors_with_most_directors()
+    connector.close()
+    if acteurs:
+        st.success("Acteurs ayant travaillé avec le plus de réalisateurs différents :")
+        for a in acteurs:
+            st.markdown(f"- **{a['acteur']}** – {a['nb_realisateurs']} réalisateur(s)")
+    else:
+        st.warning("Aucun acteur trouvé.")
+
+if st.button("23 - Recommander un film + afficher le graphe"):
+    acteur = "Scarlett Johansson"  # Vous pouvez remplacer par un st.selectbox()
+    connector = Neo4jConnector()
+    reco = connector.recommend_film_to_actor(acteur)
+    connector.close()
+    if reco:
+        st.success(f"Film recommandé à **{acteur}** :")
+        st.markdown(f"""
+        - **Titre** : {reco['titre']}  
+        - **Genres** : {reco['genres']}  
+        - **Note** : {reco['note']}
+        """)
+        draw_film_recommendation_graph(acteur)
+    else:
+        st.warning("Aucune recommandation trouvée.")
+
+if st.button("24 - Créer les relations d'influence entre réalisateurs"):
+    connector = Neo4jConnector()
+    connector.create_directors_influence_relations()
+    connector.close()
+    st.success("Relations INFLUENCE_PAR créées entre les réalisateurs.")
+
+
+
+if st.button("25 - Chemin Tom Hanks → Scarlett Johansson"):
+    draw_shortest_path_between_actors("Tom Hanks", "Scarlett Johansson")
+
+if st.button("26 - Visualiser les communautés d'acteurs (propagation de labels)"):
+    draw_actor_communities_graph()
+
+
+if st.button("Bonus : Voir les paires d’acteurs avec plusieurs films en commun"):
+    draw_actors_with_common_movies(min_common=2)
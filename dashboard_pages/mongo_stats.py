@@ -0,0 +1,137 @@
+import streamlit as st
+from db_mongo import (
+    create_high_score_high_revenue_view,
+    get_films_from_view,
+    get_runtime_and_revenue_columns,
+    get_mongo_dashboard,
+    plot_films_by_year
+)
+
+##########################################
+# Section PyMongo - Requêtes MongoDB
+##########################################
+
+# Statistiques MongoDB : agrégats lus dans film_stats + une agrégation $facet (mises en cache)
+st.header("MongoDB - Statistiques Films")
+if st.button("1 - Afficher l'année avec le plus de films"):
+    result = get_mongo_dashboard().year_with_most_films
+    if result:
+        st.write(f"L'année {result['_id']} a produit {result['count']} films.")
+    else:
+        st.write("Aucun résultat trouvé.")
+
+st.header("MongoDB - Films produits après 1999")
+if st.button("2 - Compter les films après 1999"):
+    total = get_mongo_dashboard().count_after_1999
+    st.success(f"Nombre total de films produits après 1999 : {total}")
+
+st.header("MongoDB - Moyenne des votes en 2007")
+if st.button("3 - Afficher la moyenne des votes (2007)"):
+    avg_votes = get_mongo_dashboard().avg_votes_2007
+    st.info(f"Moyenne des votes pour les films de 2007 : {round(avg_votes, 2)}")
+
+st.header("MongoDB - Statistiques avancées")
+if st.button("4 - Nombre de films par année"):
+    df_films = get_mongo_dashboard().films_by_year_dataframe()
+    st.write("Nombre de films par année :")
+    st.dataframe(df_films)
+    st.pyplot(plot_films_by_year(df_films))
+
+
+# Genres distincts
+st.header("MongoDB - Genres de films disponibles dans la BDD.")
+if st.button("5 - Genres distincts disponibles"):
+    genres = get_mongo_dashboard().genres
+    st.write(f"{len(genres)} genres trouvés :")
+    st.write(", ".join(genres))
+
+# Film avec le plus gros revenu
+st.header("MongoDB - Le film qui a généré le plus de revenu")
+if st.button("6 - Afficher le film au plus haut revenu"):
+    film = get_mongo_dashboard().film_with_highest_revenue
+    if film:
+        st.success(f"**{film['title']}** ({film['year']}) – {film['Revenue (Millions)']} M$")
+    else:
+        st.warning("Aucun film trouvé avec un revenu valide.")
+
+st.header("MongoDB - Réalisateurs prolifiques")
+if st.button("7 - Afficher les réalisateurs avec plus de 5 films"):
+    directors = get_mongo_dashboard().directors_more_than_5
+    if directors:
+        st.write("Réalisateurs ayant dirigé plus de 3 films :")
+        st.dataframe(directors)
+    else:
+        st.warning("Aucun réalisateur avec plus de 3 films trouvé.")
+
+if st.button("7bis - Réalisateurs avec plus de 2 films"):
+    data = get_mongo_dashboard().directors_more_than_2
+    st.dataframe(data)
+
+st.header("MongoDB - Genre le plus rentable")
+if st.button("8 - Genre avec revenu moyen le plus élevé"):
+    genre_info = get_mongo_dashboard().genre_with_highest_avg_revenue
+    if genre_info:
+        genre = genre_info["_id"]
+        avg = round(genre_info["avg_revenue"], 2)
+        st.success(f"Le genre **{genre}** a un revenu moyen de **{avg} M$**.")
+    else:
+        st.warning("Aucun genre avec revenu valide trouvé.")
+
+st.header("MongoDB - Top 3 par décennie : Rating & Metascore")
+if st.button("9ter - Top 3 par décennie (Rating)"):
+    results = get_mongo_dashboard().top_3_by_decade_rating
+    for entry in results:
+        st.subheader(f"Décennie {entry['_id']}s (Rating)")
+        for movie in entry["top_movies"]:
+            st.markdown(f"- **{movie.get('title', 'Inconnu')}** — {movie.get('rating', 'N/A')}")
+
+if st.button("9bis - Top 3 par décennie (Metascore)"):
+    results = get_mongo_dashboard().top_3_by_decade_metascore
+    for entry in results:
+        st.subheader(f"Décennie {entry['_id']}s (Metascore)")
+        for movie in entry["top_movies"]:
+            st.markdown(f"- **{movie.get('title', 'Inconnu')}** — Metascore : {movie.get('Metascore', 'N/A')}")
+
+st.header("MongoDB - Film le plus long par genre")
+if st.button("10 - Afficher le film le plus long pour chaque genre"):
+    results = get_mongo_dashboard().longest_film_by_genre
+    for entry in results:
+        genre = entry["_id"]
+        film = entry["longest_film"]
+        st.markdown(f"- **{genre}** → **{film['title']}** — {film['Runtime']} min")
+
+st.header("MongoDB - Vue films Metascore > 80 & Revenue > 50M")
+if st.button("11 - Créer la vue 'vue_films_80_50'", key="create_view_button"):
+    create_high_score_high_revenue_view()
+    st.success("Vue créée (ou déjà existante).")
+
+if st.button("11bis - Afficher les films de la vue", key="show_view_button"):
+    films = get_films_from_view()
+    if films:
+        for film in films:
+            st.markdown(f"- **{film.get('title', 'Inconnu')}** — Metascore : {film.get('Metascore', 'N/A')} | Revenu : {film.get('Revenue (Millions)', 'N/A')} M$")
+    else:
+        st.warning("Aucun film trouvé dans la vue.")
+
+st.header("MongoDB - Calcule de la corrélation entre la durée/revenu des films")
+if st.button("12 - Corrélation durée vs revenu"):
+    import pandas as pd
+    from analytics import runtime_revenue_correlation
+    columns = get_runtime_and_revenue_columns()
+    corr = runtime_revenue_correlation(columns)
+    if corr is not None:
+        st.write("Corrélation entre durée et revenu :", round(corr, 3))
+        st.line_chart(pd.DataFrame(columns).set_index('runtime')['revenue'])
+    else:
+        st.warning("Pas de données exploitables.")
+
+st.header("MongoDB - Évolution de la durée moyenne des films par décennie")
+if st.button("13 - Durée moyenne des films par décennie"):
+    data = get_mongo_dashboard().avg_runtime_by_decade
+    if data:
+        import pandas as pd
+        df = pd.DataFrame(data)
+        df.rename(columns={"_id": "Décennie", "avg_runtime": "Durée moyenne"}, inplace=True)
+        st.line_chart(df.set_index("Décennie"))
+    else:
+        st.warning("Aucune donnée de durée disponible.") #donc oui il y a une évolution
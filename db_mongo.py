@@ -1,51 +1,449 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
+import array
+import atexit
+import math
 import os
+import threading
 from dotenv import load_dotenv
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+from query_cache import cached_query, invalidates_cache, register_version_store
 
 dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
 load_dotenv(dotenv_path)
 
 MONGODB_URI = os.getenv("MONGODB_URI")
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "20"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_BATCH_SIZE = int(os.getenv("MONGODB_BATCH_SIZE", "1000"))
+MONGODB_MAX_TIME_MS = int(os.getenv("MONGODB_MAX_TIME_MS", "0"))  # 0 = pas de limite
 print("MONGODB_URI utilisé (db_mongo.py) :", MONGODB_URI)
 
+# Client partagé par tout le processus (MongoClient est thread-safe et gère son propre pool).
+_client = None
+_client_lock = threading.Lock()
+
 
 def get_mongo_client():
-    """Crée et retourne un client MongoDB."""
-    try:
-        print("MONGODB_URI utilisé :", MONGODB_URI)
-        client = MongoClient(MONGODB_URI)
-        client.list_database_names()
-        print("Connexion MongoDB réussie.")
-        return client
-    except Exception as e:
-        print("Erreur de connexion MongoDB :", e)
-        raise
+    """
+    Retourne le client MongoDB partagé, créé à la première demande.
+    Le test de connexion (ping) n'est exécuté qu'une seule fois, à la création.
+    """
+    global _client
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            try:
+                client = MongoClient(
+                    MONGODB_URI,
+                    maxPoolSize=MONGODB_MAX_POOL_SIZE,
+                    minPoolSize=MONGODB_MIN_POOL_SIZE,
+                )
+                client.admin.command("ping")
+                print("Connexion MongoDB réussie.")
+                _client = client
+            except Exception as e:
+                print("Erreur de connexion MongoDB :", e)
+                raise
+    return _client
+
+def close_mongo_client():
+    """Ferme le client MongoDB partagé (appelé automatiquement à la sortie du processus)."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+atexit.register(close_mongo_client)
+
+def get_collection(collection_name, db_name="entertainment"):
+    """Retourne une collection à partir du client partagé, sans nouvelle connexion."""
+    return get_mongo_client()[db_name][collection_name]
 
 def get_films_collection(db_name="entertainment", collection_name="films"):
     """Retourne la collection films depuis la base de données MongoDB."""
-    client = get_mongo_client()
-    db = client[db_name]
-    collection = db[collection_name]
-    return collection
+    return get_collection(collection_name, db_name)
+
+# Version des données MongoDB, partagée entre processus (cf. query_cache)
+META_COLLECTION = "meta"
+
+def read_data_version():
+    doc = get_collection(META_COLLECTION).find_one({"_id": "data_version"})
+    return doc["version"] if doc else 0
+
+def bump_data_version():
+    doc = get_collection(META_COLLECTION).find_one_and_update(
+        {"_id": "data_version"},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["version"]
+
+register_version_store(read_data_version, bump_data_version)
+
+def iter_aggregate(pipeline, batch_size=None, max_time_ms=None, allow_disk_use=True, collection=None):
+    """
+    Exécute une agrégation et itère sur les résultats lot par lot (mémoire constante).
+    allowDiskUse permet aux gros $sort / $group de déborder sur disque ; max_time_ms
+    (ou MONGODB_MAX_TIME_MS) borne la durée côté serveur.
+    """
+    collection = collection if collection is not None else get_films_collection()
+    options = {
+        "batchSize": batch_size or MONGODB_BATCH_SIZE,
+        "allowDiskUse": allow_disk_use,
+    }
+    max_time_ms = max_time_ms if max_time_ms is not None else MONGODB_MAX_TIME_MS
+    if max_time_ms:
+        options["maxTimeMS"] = max_time_ms
+    with collection.aggregate(pipeline, **options) as cursor:
+        yield from cursor
+
+# Types de colonnes acceptés par fetch_columns : dtype NumPy -> code du module array
+COLUMN_TYPECODES = {"float64": "d", "int64": "q", "int32": "i"}
+
+def fetch_columns(pipeline, dtypes, batch_size=None, max_time_ms=None):
+    """
+    Exécute une agrégation et remplit directement des colonnes typées (une par champ),
+    sans conserver de liste de dicts. dtypes : {champ: "float64" | "int64" | "int32"}.
+    Les valeurs manquantes donnent NaN dans les colonnes float64 ; les colonnes entières
+    n'ont pas de valeur manquante : filtrer les nulls dans le $match du pipeline (sinon ValueError).
+    Retourne un dict {champ: numpy.ndarray}.
+    """
+    import numpy as np
+
+    buffers = {name: array.array(COLUMN_TYPECODES[dtype]) for name, dtype in dtypes.items()}
+    appends = [(name, buffers[name].append, dtypes[name] == "float64") for name in dtypes]
+    for doc in iter_aggregate(pipeline, batch_size, max_time_ms):
+        for name, append, is_float in appends:
+            value = doc.get(name)
+            if value is None:
+                if not is_float:
+                    raise ValueError(
+                        f"Valeur manquante dans la colonne entière '{name}' : "
+                        "filtrer les nulls dans $match ou utiliser float64."
+                    )
+                value = math.nan
+            append(value)
+    return {name: np.frombuffer(buffers[name], dtype=dtypes[name]) for name in dtypes}
+
+def fetch_arrow_table(pipeline, dtypes, batch_size=None, max_time_ms=None):
+    """Comme fetch_columns, mais retourne une table Arrow (colonnes NumPy sans copie)."""
+    import pyarrow as pa
+
+    return pa.table(fetch_columns(pipeline, dtypes, batch_size, max_time_ms))
+
+def _to_number(field, to):
+    """Expression de conversion numérique : "" / valeur invalide / absente -> null."""
+    return {"$convert": {"input": f"${field}", "to": to, "onError": None, "onNull": None}}
+
+def _split_trimmed(field):
+    """Expression qui découpe une chaîne séparée par des virgules en tableau de valeurs nettoyées."""
+    parts = {"$map": {
+        "input": {"$split": [{"$ifNull": [f"${field}", ""]}, ","]},
+        "as": "part",
+        "in": {"$trim": {"input": "$$part"}},
+    }}
+    return {"$filter": {"input": parts, "as": "value", "cond": {"$ne": ["$$value", ""]}}}
+
+# Champs numériques typés par la migration. Leur valeur d'origine est sauvegardée dans
+# 'raw_fields' à la première normalisation (les chaînes non convertibles comme "unrated"
+# ne sont pas perdues et la migration peut être annulée, cf. restore_films_collection).
+NUMERIC_FILM_FIELDS = ["year", "Votes", "rating", "Metascore", "Revenue (Millions)", "Runtime (Minutes)"]
+
+# Pipeline de mise à jour qui type les champs numériques et stocke la décennie.
+FILM_NORMALIZATION_PIPELINE = [
+    {"$set": {
+        "raw_fields": {"$ifNull": ["$raw_fields", {name: f"${name}" for name in NUMERIC_FILM_FIELDS}]},
+    }},
+    {"$set": {
+        "year": _to_number("year", "int"),
+        "Votes": _to_number("Votes", "int"),
+        "rating": _to_number("rating", "double"),
+        "Metascore": _to_number("Metascore", "int"),
+        "Revenue (Millions)": _to_number("Revenue (Millions)", "double"),
+        "Runtime (Minutes)": _to_number("Runtime (Minutes)", "int"),
+    }},
+    {"$set": {
+        "decade": {"$subtract": ["$year", {"$mod": ["$year", 10]}]},
+        "genres": _split_trimmed("genre"),
+        "actors": _split_trimmed("Actors"),
+        "directors": _split_trimmed("Director"),
+    }},
+]
+
+FILM_STATS_COLLECTION = "film_stats"
+
+# Index de la collection films, alignés sur les requêtes de ce module
+# (les tableaux matérialisés donnent des index multiclés).
+FILM_INDEXES = [
+    [("year", 1)],
+    [("Director", 1)],
+    [("rating", -1)],
+    [("Revenue (Millions)", -1)],
+    [("Runtime (Minutes)", -1)],
+    [("decade", 1), ("rating", -1)],
+    [("decade", 1), ("Metascore", -1)],
+    [("genres", 1)],
+    [("actors", 1)],
+    [("directors", 1)],
+]
+
+def ensure_mongo_indexes():
+    """Crée les index des collections films et film_stats s'ils n'existent pas (idempotent)."""
+    collection = get_films_collection()
+    names = [collection.create_index(keys) for keys in FILM_INDEXES]
+    names.append(get_collection(FILM_STATS_COLLECTION).create_index([("kind", 1), ("key", 1)]))
+    print(f"{len(names)} index MongoDB vérifiés.")
+    return names
+
+def require_materialized_fields(*fields):
+    """
+    Lève une erreur explicite si des films n'ont pas encore les tableaux matérialisés
+    `fields` (migration non lancée), plutôt que de renvoyer des résultats vides.
+    """
+    collection = get_films_collection()
+    for name in fields:
+        if collection.find_one({name: {"$exists": False}}, {"_id": 1}) is not None:
+            raise RuntimeError(
+                f"Des films n'ont pas le champ '{name}' : lancer d'abord migrate_film_schema.py "
+                "(--new-only après un nouvel import)."
+            )
+
+@invalidates_cache
+def normalize_films_collection(filter=None):
+    """
+    Migration : convertit les champs numériques stockés en chaînes en vrais nombres,
+    remplace les chaînes vides par null, stocke un champ 'decade' et les tableaux
+    'genres', 'actors' et 'directors' (avec leurs index multiclés). Les valeurs d'origine
+    sont sauvegardées dans 'raw_fields' (cf. restore_films_collection).
+    Idempotente ; `filter` permet de ne normaliser que des documents nouvellement insérés :
+    seuls les groupes de statistiques (année, décennie, genre) de ces films sont alors recalculés.
+    """
+    collection = get_films_collection()
+    if filter is None:
+        result = collection.update_many({}, FILM_NORMALIZATION_PIPELINE)
+        ensure_mongo_indexes()
+        refresh_film_stats()
+    else:
+        # Le filtre peut porter sur des champs que la normalisation modifie : on fixe les _id
+        ids = [doc["_id"] for doc in collection.find(filter, {"_id": 1})]
+        by_id = {"_id": {"$in": ids}}
+        previous = list(collection.find(by_id, STATS_KEY_PROJECTION))
+        result = collection.update_many(by_id, FILM_NORMALIZATION_PIPELINE)
+        ensure_mongo_indexes()
+        refresh_film_stats(_stats_keys(previous + list(collection.find(by_id, STATS_KEY_PROJECTION))))
+    print(f"{result.modified_count} films normalisés.")
+    return result.modified_count
+
+@invalidates_cache
+def restore_films_collection(filter=None):
+    """
+    Annule la migration : remet les valeurs d'origine sauvegardées dans 'raw_fields' et
+    supprime les champs dérivés ('decade', 'genres', 'actors', 'directors').
+    Un champ absent à l'origine reste à null.
+    """
+    collection = get_films_collection()
+    result = collection.update_many(
+        {**(filter or {}), "raw_fields": {"$exists": True}},
+        [
+            {"$replaceWith": {"$mergeObjects": ["$$ROOT", "$raw_fields"]}},
+            {"$unset": ["raw_fields", "decade", "genres", "actors", "directors"]},
+        ],
+    )
+    refresh_film_stats()
+    print(f"{result.modified_count} films restaurés.")
+    return result.modified_count
+
+@invalidates_cache
+def save_film(film):
+    """
+    Insère ou remplace un film puis le normalise, pour que les champs typés
+    et les tableaux matérialisés restent à jour à chaque écriture.
+    """
+    collection = get_films_collection()
+    previous = None
+    if "_id" in film:
+        previous = collection.find_one({"_id": film["_id"]}, STATS_KEY_PROJECTION)
+        collection.replace_one({"_id": film["_id"]}, film, upsert=True)
+        film_id = film["_id"]
+    else:
+        film_id = collection.insert_one(film).inserted_id
+    collection.update_one({"_id": film_id}, FILM_NORMALIZATION_PIPELINE)
+
+    # Mise à jour incrémentale des statistiques : anciens et nouveaux groupes du film
+    current = collection.find_one({"_id": film_id}, STATS_KEY_PROJECTION)
+    refresh_film_stats(_stats_keys([doc for doc in (previous, current) if doc]))
+    return film_id
+
+# Statistiques matérialisées : un document par (kind, key), ex. {"kind": "year", "key": 2007}.
+# kind -> (champ de regroupement dans films, étapes préalables)
+STATS_GROUPS = {
+    "year": ("year", []),
+    "decade": ("decade", []),
+    "genre": ("genres", [{"$unwind": "$genres"}]),
+}
+STATS_KEY_PROJECTION = {"year": 1, "decade": 1, "genres": 1}
+
+def _stats_keys(docs):
+    """Groupes de statistiques {kind: [keys]} touchés par des documents (projection STATS_KEY_PROJECTION)."""
+    keys = {kind: set() for kind in STATS_GROUPS}
+    for doc in docs:
+        keys["year"].add(doc.get("year"))
+        keys["decade"].add(doc.get("decade"))
+        keys["genre"].update(doc.get("genres") or [])
+    return {kind: [k for k in values if k is not None] for kind, values in keys.items()}
+
+def _stats_pipeline(kind, keys=None):
+    field, pre_stages = STATS_GROUPS[kind]
+    match = {field: {"$in": list(keys)} if keys is not None else {"$ne": None}}
+    # Avec un $unwind (genres), le premier $match utilise l'index multiclé et évite de dérouler
+    # toute la collection ; le second ne garde que les clés demandées parmi les valeurs déroulées.
+    pre_match = [{"$match": match}] if pre_stages else []
+    return pre_match + pre_stages + [
+        {"$match": match},
+        {"$group": {
+            "_id": {"kind": kind, "key": f"${field}"},
+            "count": {"$sum": 1},
+            "avg_votes": {"$avg": "$Votes"},
+            "avg_rating": {"$avg": "$rating"},
+            "avg_runtime": {"$avg": "$Runtime (Minutes)"},
+            "min_runtime": {"$min": "$Runtime (Minutes)"},
+            "max_runtime": {"$max": "$Runtime (Minutes)"},
+            "avg_revenue": {"$avg": "$Revenue (Millions)"},
+            "min_revenue": {"$min": "$Revenue (Millions)"},
+            "max_revenue": {"$max": "$Revenue (Millions)"},
+            "revenue_sum": {"$sum": "$Revenue (Millions)"},
+        }},
+        {"$set": {"kind": "$_id.kind", "key": "$_id.key"}},
+        {"$merge": {"into": FILM_STATS_COLLECTION, "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+@invalidates_cache
+def refresh_film_stats(keys_by_kind=None):
+    """
+    Recalcule la collection film_stats avec $merge.
+    Sans argument : reconstruction complète. Avec {kind: [keys]} : seuls ces groupes sont
+    recalculés (les groupes devenus vides sont supprimés).
+    """
+    collection = get_films_collection()
+    stats = get_collection(FILM_STATS_COLLECTION)
+    for kind in STATS_GROUPS:
+        keys = None
+        if keys_by_kind is not None:
+            keys = keys_by_kind.get(kind)
+            if not keys:
+                continue
+            stats.delete_many({"kind": kind, "key": {"$in": list(keys)}})
+        else:
+            stats.delete_many({"kind": kind})
+        collection.aggregate(_stats_pipeline(kind, keys))
+    if keys_by_kind is None:
+        # Marqueur : film_stats a été construite au moins une fois (même vide)
+        get_collection(META_COLLECTION).update_one(
+            {"_id": FILM_STATS_COLLECTION}, {"$currentDate": {"built_at": True}}, upsert=True
+        )
+
+def require_film_stats():
+    """
+    Lève une erreur explicite si film_stats n'a jamais été construite : une lecture ne
+    déclenche pas de reconstruction (écriture qui viderait aussi tous les caches).
+    """
+    if get_collection(META_COLLECTION).find_one({"_id": FILM_STATS_COLLECTION}, {"_id": 1}) is not None:
+        return
+    if get_collection(FILM_STATS_COLLECTION).find_one({}, {"_id": 1}) is not None:
+        return
+    require_materialized_fields("decade", "genres")
+    raise RuntimeError(
+        "La collection film_stats n'a jamais été construite : lancer migrate_film_schema.py "
+        "(ou refresh_film_stats())."
+    )
+
+def _get_stats(kind, **filters):
+    """Lit les statistiques matérialisées d'un type de groupe (jamais reconstruites à la lecture)."""
+    require_film_stats()
+    stats = get_collection(FILM_STATS_COLLECTION)
+    return stats.find({"kind": kind, **filters}).sort("key", 1)
+
+# Pipelines partagés entre les fonctions individuelles et le tableau de bord ($facet)
+HIGHEST_REVENUE_PIPELINE = [
+    {"$match": {"Revenue (Millions)": {"$ne": None}}},
+    {"$sort": {"Revenue (Millions)": -1}},
+    {"$limit": 1}
+]
+
+DIRECTORS_MORE_THAN_5_PIPELINE = [
+    {"$group": {"_id": "$Director", "number_of_films": {"$sum": 1}}},
+    {"$match": {"number_of_films": {"$gt": 5}}},
+    {"$sort": {"number_of_films": -1}}  # Optionnel : tri par nombre décroissant
+]
+
+DIRECTORS_MORE_THAN_2_PIPELINE = [
+    {"$unwind": "$directors"},
+    {"$group": {"_id": "$directors", "number_of_films": {"$sum": 1}}},
+    {"$match": {"number_of_films": {"$gt": 2}}},
+    {"$sort": {"number_of_films": -1}}
+]
+
+LONGEST_FILM_BY_GENRE_PIPELINE = [
+    {"$match": {"Runtime (Minutes)": {"$ne": None}}},
+    {
+        "$project": {
+            "genres": 1,
+            "title": 1,
+            "runtime": "$Runtime (Minutes)"
+        }
+    },
+    {"$sort": {"runtime": -1}},
+    {"$unwind": "$genres"},
+    {
+        "$group": {
+            "_id": "$genres",
+            "longest_film": {
+                "$first": {
+                    "title": "$title",
+                    "Runtime": "$runtime"
+                }
+            }
+        }
+    }
+]
+
+def _top_by_decade_pipeline(field, n=3, output=None):
+    """
+    Top n films par décennie selon `field` (rating ou Metascore) : {_id: décennie, top_movies}.
+    $topN ne garde que n documents par groupe : mémoire en O(décennies x n), sans tri global.
+    """
+    return [
+        {"$match": {field: {"$ne": None}, "decade": {"$ne": None}}},
+        {
+            "$group": {
+                "_id": "$decade",
+                "top_movies": {
+                    "$topN": {
+                        "n": n,
+                        "sortBy": {field: -1},
+                        "output": output or {"title": "$title", field: f"${field}"}
+                    }
+                }
+            }
+        },
+        {"$sort": {"_id": 1}}
+    ]
 
+@cached_query()
 def get_year_with_most_films():
     """
     Exemple de requête : trouver l'année où le plus grand nombre de films a été produit.
     Nécessite que chaque document ait un champ 'year'.
     """
-    collection = get_films_collection()
-    pipeline = [
-        {"$group": {"_id": "$year", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-        {"$limit": 1}
-    ]
-    result = list(collection.aggregate(pipeline))
-    return result[0] if result else None
+    result = list(_get_stats("year").sort("count", -1).limit(1))
+    return {"_id": result[0]["key"], "count": result[0]["count"]} if result else None
 
+@cached_query()
 def count_films_after_1999():
     """
     Compte le nombre total de films produits après 1999.
@@ -58,37 +456,20 @@ def count_films_after_1999():
     result = list(collection.aggregate(pipeline))
     return result[0]["total_films_apres_1999"] if result else 0
 
+@cached_query()
 def get_avg_votes_for_2007():
     """
     Calcule la moyenne des votes pour les films sortis en 2007.
     """
-    collection = get_films_collection()
-    pipeline = [
-        {"$match": {"year": 2007}},
-        {"$group": {"_id": None, "avg_votes": {"$avg": "$Votes"}}}
-    ]
-    result = list(collection.aggregate(pipeline))
-    return result[0]["avg_votes"] if result else 0
+    result = list(_get_stats("year", key=2007).limit(1))
+    return result[0]["avg_votes"] if result and result[0]["avg_votes"] is not None else 0
+
+def plot_films_by_year(df):
+    """Histogramme du nombre de films par année (DataFrame avec colonnes Year / Count)."""
+    # Imports locaux : les scripts d'export n'ont pas à charger les bibliothèques de tracé
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-def count_films_by_year():
-    """
-    Retourne un DataFrame du nombre de films par année
-    ET un histogramme à partir du pipeline MongoDB.
-    """
-    collection = get_films_collection()
-    
-    # Pipeline MongoDB
-    pipeline = [
-        {"$group": {"_id": "$year", "count": {"$sum": 1}}},
-        {"$sort": {"_id": 1}}
-    ]
-    results = list(collection.aggregate(pipeline))
-    
-    # Conversion en DataFrame
-    df = pd.DataFrame(results)
-    df = df.rename(columns={"_id": "Year", "count": "Count"})
-    
-    # Création du graphique
     fig, ax = plt.subplots(figsize=(10, 6))
     sns.barplot(x="Year", y="Count", data=df, color="skyblue", ax=ax)
     ax.set_xlabel("Année")
@@ -96,199 +477,79 @@ def count_films_by_year():
     ax.set_title("Nombre de films par année")
     plt.xticks(rotation=45)
     plt.tight_layout()
-    
-    return df, fig
+    return fig
 
+@cached_query(ttl=3600)
 def get_distinct_genres():
     """
     Retourne la liste des genres distincts dans la base.
     """
+    require_materialized_fields("genres")
     collection = get_films_collection()
-    pipeline = [
-        {"$project": {"genre": {"$split": ["$genre", ","]}}},
-        {"$unwind": "$genre"},
-        {"$group": {"_id": "$genre"}}
-    ]
-    return [genre["_id"].strip() for genre in collection.aggregate(pipeline)]
+    return collection.distinct("genres")
 
 
+@cached_query()
 def get_film_with_highest_revenue():
     """
     Retourne le film avec le revenu le plus élevé (hors valeurs vides).
     """
     collection = get_films_collection()
-    pipeline = [
-        {"$match": {"Revenue (Millions)": {"$ne": ""}}},
-        {"$sort": {"Revenue (Millions)": -1}},
-        {"$limit": 1}
-    ]
-    result = list(collection.aggregate(pipeline))
+    result = list(collection.aggregate(HIGHEST_REVENUE_PIPELINE))
     return result[0] if result else None
 
+@cached_query()
 def get_directors_with_more_than_5_films():
     """
     Retourne la liste des réalisateurs ayant réalisé plus de 5 films.
     """
     collection = get_films_collection()
-    pipeline = [
-        {"$group": {"_id": "$Director", "number_of_films": {"$sum": 1}}},
-        {"$match": {"number_of_films": {"$gt": 5}}},
-        {"$sort": {"number_of_films": -1}}  # Optionnel : tri par nombre décroissant
-    ]
-    return list(collection.aggregate(pipeline))
+    return list(collection.aggregate(DIRECTORS_MORE_THAN_5_PIPELINE))
 
+@cached_query()
 def get_directors_with_more_than_2_films_split():
     """
     Prend en compte les réalisateurs multiples séparés par des virgules.
     """
+    require_materialized_fields("directors")
     collection = get_films_collection()
-    pipeline = [
-        {"$project": {"Director": {"$split": ["$Director", ","]}}},
-        {"$unwind": "$Director"},
-        {"$group": {"_id": {"$trim": {"input": "$Director"}}, "number_of_films": {"$sum": 1}}},
-        {"$match": {"number_of_films": {"$gt": 2}}},
-        {"$sort": {"number_of_films": -1}}
-    ]
-    return list(collection.aggregate(pipeline))
+    return list(collection.aggregate(DIRECTORS_MORE_THAN_2_PIPELINE))
 
+@cached_query()
 def get_genre_with_highest_avg_revenue():
     """
     Retourne le genre avec le revenu moyen le plus élevé.
     """
-    collection = get_films_collection()
-    pipeline = [
-        {"$match": {"Revenue (Millions)": {"$ne": ""}}},
-        {
-            "$project": {
-                "genre": {"$split": ["$genre", ","]},
-                "revenue": {"$toDouble": "$Revenue (Millions)"}
-            }
-        },
-        {"$unwind": "$genre"},
-        {"$group": {"_id": {"$trim": {"input": "$genre"}}, "avg_revenue": {"$avg": "$revenue"}}},
-        {"$sort": {"avg_revenue": -1}},
-        {"$limit": 1}
-    ]
-    result = list(collection.aggregate(pipeline))
-    return result[0] if result else None
+    result = list(_get_stats("genre", avg_revenue={"$ne": None}).sort("avg_revenue", -1).limit(1))
+    return {"_id": result[0]["key"], "avg_revenue": result[0]["avg_revenue"]} if result else None
 
-def get_top_3_by_decade_rating():
+@cached_query()
+def get_top_3_by_decade_rating(n=3):
     """
-    Top 3 films par décennie selon le rating (note IMDb).
+    Top 3 (ou n) films par décennie selon le rating (note IMDb).
     """
     collection = get_films_collection()
-    pipeline = [
-        {"$match": {"rating": {"$ne": "unrated"}}},
-        {
-            "$addFields": {
-                "decade": {
-                    "$subtract": [
-                        {"$toInt": "$year"},
-                        {"$mod": [{"$toInt": "$year"}, 10]}
-                    ]
-                }
-            }
-        },
-        {"$sort": {"decade": 1, "rating": -1}},
-        {
-            "$group": {
-                "_id": "$decade",
-                "top_movies": {
-                    "$push": {
-                        "title": "$title",
-                        "rating": "$rating"
-                    }
-                }
-            }
-        },
-        {
-            "$project": {
-                "_id": 1,
-                "top_movies": {"$slice": ["$top_movies", 3]}
-            }
-        },
-        {"$sort": {"_id": 1}}
-    ]
-    return list(collection.aggregate(pipeline))
+    return list(collection.aggregate(_top_by_decade_pipeline("rating", n)))
 
-def get_top_3_by_decade_metascore():
+@cached_query()
+def get_top_3_by_decade_metascore(n=3):
     """
-    Top 3 films par décennie selon le Metascore.
+    Top 3 (ou n) films par décennie selon le Metascore.
     """
     collection = get_films_collection()
-    pipeline = [
-        {
-            "$match": {
-                "Metascore": {"$ne": ""}
-            }
-        },
-        {
-            "$addFields": {
-                "decade": {
-                    "$subtract": [
-                        {"$toInt": "$year"},
-                        {"$mod": [{"$toInt": "$year"}, 10]}
-                    ]
-                },
-                "MetascoreInt": {"$toInt": "$Metascore"}
-            }
-        },
-        {
-            "$sort": {
-                "decade": 1,
-                "MetascoreInt": -1
-            }
-        },
-        {
-            "$group": {
-                "_id": "$decade",
-                "top_movies": {
-                    "$push": {
-                        "title": "$title",
-                        "Metascore": "$MetascoreInt"
-                    }
-                }
-            }
-        },
-        {
-            "$project": {
-                "_id": 1,
-                "top_movies": {"$slice": ["$top_movies", 3]}
-            }
-        },
-        {
-            "$sort": {
-                "_id": 1
-            }
-        }
-    ]
-    return list(collection.aggregate(pipeline))
-
+    return list(collection.aggregate(_top_by_decade_pipeline("Metascore", n)))
 
-def get_top_3_full_films_by_decade():
+@cached_query()
+def get_top_3_full_films_by_decade(n=3):
     """
-    Retourne les 3 meilleurs films complets (tous champs) par décennie selon le rating.
+    Retourne les 3 (ou n) meilleurs films complets (tous champs) par décennie selon le rating.
     """
     collection = get_films_collection()
-    pipeline = [
-        {
-            "$addFields": {
-                "decade": {
-                    "$subtract": ["$year", {"$mod": ["$year", 10]}]
-                }
-            }
-        },
-        {"$sort": {"decade": 1, "rating": -1}},
-        {
-            "$group": {
-                "_id": "$decade",
-                "films": {"$push": "$$ROOT"}
-            }
-        },
+    pipeline = _top_by_decade_pipeline("rating", n, output="$$ROOT") + [
         {
             "$project": {
                 "decade": "$_id",
-                "topFilms": {"$slice": ["$films", 3]},
+                "topFilms": "$top_movies",
                 "_id": 0
             }
         }
@@ -303,39 +564,79 @@ if __name__ == "__main__":
     total = count_films_after_1999()
     print("Nombre de films après 1999 :", total)
 
+@cached_query()
 def get_longest_film_by_genre():
     """
     Retourne le film le plus long pour chaque genre.
     """
     collection = get_films_collection()
+    return list(collection.aggregate(LONGEST_FILM_BY_GENRE_PIPELINE))
+
+@dataclass
+class MongoDashboard:
+    """Résultat de get_mongo_dashboard() : toutes les statistiques de la section MongoDB."""
+    films_by_year: list = field(default_factory=list)
+    year_with_most_films: Optional[dict] = None
+    count_after_1999: int = 0
+    avg_votes_2007: float = 0
+    genres: list = field(default_factory=list)
+    film_with_highest_revenue: Optional[dict] = None
+    genre_with_highest_avg_revenue: Optional[dict] = None
+    directors_more_than_5: list = field(default_factory=list)
+    directors_more_than_2: list = field(default_factory=list)
+    top_3_by_decade_rating: list = field(default_factory=list)
+    top_3_by_decade_metascore: list = field(default_factory=list)
+    longest_film_by_genre: list = field(default_factory=list)
+    avg_runtime_by_decade: list = field(default_factory=list)
+
+    def films_by_year_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame(
+            [{"Year": r["_id"], "Count": r["count"]} for r in self.films_by_year],
+            columns=["Year", "Count"],
+        )
+
+@cached_query()
+def get_mongo_dashboard():
+    """
+    Calcule toutes les statistiques de la section MongoDB. Les agrégats par année, décennie
+    et genre sont lus dans film_stats (index (kind, key)) ; seules les statistiques sans
+    forme matérialisée passent par une agrégation $facet sur la collection films.
+    """
+    require_materialized_fields("genres", "directors")
+    collection = get_films_collection()
     pipeline = [
-        {"$match": {"Runtime (Minutes)": {"$ne": ""}}},
-        {
-            "$project": {
-                "genre": {"$split": ["$genre", ","]},
-                "title": 1,
-                "runtime": {"$toInt": "$Runtime (Minutes)"}
-            }
-        },
-        {"$unwind": "$genre"},
-        {"$sort": {"runtime": -1}},
-        {
-            "$group": {
-                "_id": {"$trim": {"input": "$genre"}},
-                "longest_film": {
-                    "$first": {
-                        "title": "$title",
-                        "Runtime": "$runtime"
-                    }
-                }
-            }
-        }
+        {"$facet": {
+            "highest_revenue": HIGHEST_REVENUE_PIPELINE,
+            "directors_5": DIRECTORS_MORE_THAN_5_PIPELINE,
+            "directors_2": DIRECTORS_MORE_THAN_2_PIPELINE,
+            "top_rating": _top_by_decade_pipeline("rating"),
+            "top_metascore": _top_by_decade_pipeline("Metascore"),
+            "longest": LONGEST_FILM_BY_GENRE_PIPELINE,
+        }}
     ]
-    return list(collection.aggregate(pipeline))
-
+    facets = next(collection.aggregate(pipeline, allowDiskUse=True))
+
+    by_year = [{"_id": r["key"], "count": r["count"]} for r in _get_stats("year")]
+    return MongoDashboard(
+        films_by_year=by_year,
+        year_with_most_films=get_year_with_most_films(),
+        count_after_1999=sum(y["count"] for y in by_year if y["_id"] > 1999),
+        avg_votes_2007=get_avg_votes_for_2007(),
+        genres=[r["key"] for r in _get_stats("genre")],
+        film_with_highest_revenue=facets["highest_revenue"][0] if facets["highest_revenue"] else None,
+        genre_with_highest_avg_revenue=get_genre_with_highest_avg_revenue(),
+        directors_more_than_5=facets["directors_5"],
+        directors_more_than_2=facets["directors_2"],
+        top_3_by_decade_rating=facets["top_rating"],
+        top_3_by_decade_metascore=facets["top_metascore"],
+        longest_film_by_genre=facets["longest"],
+        avg_runtime_by_decade=get_avg_runtime_by_decade(),
+    )
+
+@invalidates_cache
 def create_high_score_high_revenue_view():
-    client = get_mongo_client()
-    db = client["entertainment"]
+    db = get_mongo_client()["entertainment"]
 
     view_name = "vue_films_80_50"
     source_collection = "films"
@@ -357,68 +658,60 @@ def create_high_score_high_revenue_view():
         else:
             print("Erreur :", e)
 
+@cached_query(ttl=300)
 def get_films_from_view(limit=10):
     """
     Récupère les films depuis la vue 'vue_films_80_50'
     """
-    client = get_mongo_client()
-    db = client["entertainment"]
-    view = db["vue_films_80_50"]
+    view = get_collection("vue_films_80_50")
     return list(view.find().limit(limit))
 
+@cached_query()
 def get_runtime_and_revenue():
     """
     Extrait les couples (durée, revenu) pour analyse statistique de corrélation.
     """
-    collection = get_films_collection()
-    pipeline = [
-        {"$match": {
-            "Runtime (Minutes)": {"$ne": ""},
-            "Revenue (Millions)": {"$ne": ""}
-        }},
-        {"$project": {
-            "runtime": {"$toInt": "$Runtime (Minutes)"},
-            "revenue": {"$toDouble": "$Revenue (Millions)"}
-        }}
-    ]
-    return list(collection.aggregate(pipeline))
-
+    return list(iter_runtime_and_revenue())
+
+RUNTIME_AND_REVENUE_PIPELINE = [
+    {"$match": {
+        "Runtime (Minutes)": {"$ne": None},
+        "Revenue (Millions)": {"$ne": None}
+    }},
+    {"$project": {
+        "_id": 0,
+        "runtime": "$Runtime (Minutes)",
+        "revenue": "$Revenue (Millions)"
+    }}
+]
+
+def iter_runtime_and_revenue(batch_size=None, max_time_ms=None):
+    """Variante en flux de get_runtime_and_revenue()."""
+    return iter_aggregate(RUNTIME_AND_REVENUE_PIPELINE, batch_size, max_time_ms)
+
+@cached_query()
+def get_runtime_and_revenue_columns():
+    """Variante colonnaire de get_runtime_and_revenue() : {"runtime": ndarray, "revenue": ndarray}."""
+    return fetch_columns(RUNTIME_AND_REVENUE_PIPELINE, {"runtime": "float64", "revenue": "float64"})
+
+@cached_query()
 def get_avg_runtime_by_decade():
     """
     Calcule la durée moyenne des films par décennie.
     """
-    collection = get_films_collection()
-    pipeline = [
-        {"$match": {"Runtime (Minutes)": {"$ne": ""}, "year": {"$ne": None}}},
-        {
-            "$addFields": {
-                "yearInt": {"$toInt": "$year"},
-                "runtimeInt": {"$toInt": "$Runtime (Minutes)"},
-                "decade": {
-                    "$subtract": [
-                        {"$toInt": "$year"},
-                        {"$mod": [{"$toInt": "$year"}, 10]}
-                    ]
-                }
-            }
-        },
-        {
-            "$group": {
-                "_id": "$decade",
-                "avg_runtime": {"$avg": "$runtimeInt"}
-            }
-        },
-        {"$sort": {"_id": 1}}
-    ]
-    return list(collection.aggregate(pipeline))
+    results = _get_stats("decade", avg_runtime={"$ne": None})
+    return [{"_id": r["key"], "avg_runtime": r["avg_runtime"]} for r in results]
 
 ##################################################################################
 def get_films_for_neo4j():
-    collection = get_films_collection()
+    return list(iter_films_for_neo4j())
+
+def iter_films_for_neo4j(batch_size=None, max_time_ms=None):
+    """Variante en flux de get_films_for_neo4j()."""
     pipeline = [
         {
             "$match": {
-                "Revenue (Millions)": {"$ne": ""}
+                "Revenue (Millions)": {"$ne": None}
             }
         },
         {
@@ -427,63 +720,55 @@ def get_films_for_neo4j():
                 "title": 1,
                 "year": 1,
                 "votes": "$Votes",
-                "revenue": {"$toDouble": "$Revenue (Millions)"},
+                "revenue": "$Revenue (Millions)",
                 "rating": None,
                 "director": "$Director"
             }
         }
     ]
-    return list(collection.aggregate(pipeline))
+    return iter_aggregate(pipeline, batch_size, max_time_ms)
 
 def get_distinct_actors():
     """
-    Retourne une liste d'acteurs distincts depuis MongoDB en normalisant la chaîne pour corriger
-    l'absence d'espace après la virgule.
+    Retourne une liste d'acteurs distincts depuis le tableau matérialisé 'actors' (index multiclé).
     """
+    require_materialized_fields("actors")
     collection = get_films_collection()
-    pipeline = [
-        {"$match": {"Actors": {"$ne": ""}}},
-        {"$project": {"Actors": 1}}
-    ]
-    actors_set = set()
-    for film in collection.aggregate(pipeline):
-        actors_field = film.get("Actors", "")
-        # Normaliser la chaîne : insérer un espace après chaque virgule si nécessaire
-        corrected = re.sub(r",(\S)", r", \1", actors_field)
-        # Découper la chaîne normalisée en fonction de ", "
-        for actor in corrected.split(", "):
-            actors_set.add(actor.strip())
-    return list(actors_set)
+    return collection.distinct("actors")
 
 def get_actor_film_relations():
     """
     Récupère les relations entre acteurs et films.
     Retourne une liste de dicts : {actor, film_id}
     """
-    collection = get_films_collection()
+    return list(iter_actor_film_relations())
+
+def iter_actor_film_relations(batch_size=None, max_time_ms=None):
+    """Variante en flux de get_actor_film_relations() (acteurs d'un même film consécutifs)."""
+    require_materialized_fields("actors")
     pipeline = [
-        {"$match": {"Actors": {"$ne": ""}}},
-        {"$project": {"film_id": "$_id", "Actors": 1}}
+        {"$match": {"actors.0": {"$exists": True}}},
+        {"$project": {"actors": 1}},
+        {"$unwind": "$actors"},
+        {"$project": {"_id": 0, "actor": "$actors", "film_id": "$_id"}}
     ]
-    
-    relations = []
-    for film in collection.aggregate(pipeline):
-        film_id = film.get("film_id")
-        actors_field = film.get("Actors", "")
-        # Normaliser la chaîne : insertion d'un espace après la virgule si nécessaire
-        corrected = re.sub(r",(\S)", r", \1", actors_field)
-        # Découper la chaîne normalisée en fonction de ", " et retirer les espaces superflus
-        for actor in corrected.split(", "):
-            relations.append({"actor": actor.strip(), "film_id": film_id})
-            
-    return relations
+    return iter_aggregate(pipeline, batch_size, max_time_ms)
 
 def get_director_film_relations():
     """
     Récupère les relations réalisateur-film depuis MongoDB.
     Retourne une liste de dicts : {director, film_id}
     """
-    collection = get_films_collection()
+    results = list(iter_director_film_relations())
+
+    # Juste pour debug, affiche un exemple
+    if results:
+        print("Exemple de relation réalisateur-film :", results[0])
+
+    return results
+
+def iter_director_film_relations(batch_size=None, max_time_ms=None):
+    """Variante en flux de get_director_film_relations()."""
     pipeline = [
         {"$match": {"Director": {"$ne": ""}}},
         {"$project": {
@@ -491,10 +776,4 @@ def get_director_film_relations():
             "director": "$Director"
         }}
     ]
-    results = list(collection.aggregate(pipeline))
-
-    # Juste pour debug, affiche un exemple
-    if results:
-        print("Exemple de relation réalisateur-film :", results[0])
-
-    return results
\ No newline at end of file
+    return iter_aggregate(pipeline, batch_size, max_time_ms)
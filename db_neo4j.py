@@ -1,8 +1,13 @@
+import atexit
 import os
+import threading
+import time
+from itertools import islice
 from dotenv import load_dotenv
-from neo4j import GraphDatabase
+from neo4j import GraphDatabase, Query
+from neo4j.exceptions import ClientError
 
-from db_mongo import get_films_collection
+from query_cache import cached_query, invalidates_cache, register_version_store
 
 
 dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -11,25 +16,150 @@ load_dotenv(dotenv_path)
 NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USER = os.getenv("NEO4J_USER")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+NEO4J_MAX_CONNECTION_LIFETIME = int(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+NEO4J_BATCH_SIZE = int(os.getenv("NEO4J_BATCH_SIZE", "1000"))
+SHORTEST_PATH_MAX_HOPS = int(os.getenv("SHORTEST_PATH_MAX_HOPS", "12"))
+SHORTEST_PATH_TIMEOUT = float(os.getenv("SHORTEST_PATH_TIMEOUT", "10"))
 
 print("NEO4J_URI utilisé :", NEO4J_URI)
 
+# Driver partagé par tout le processus (le driver Neo4j est thread-safe et gère son pool).
+_driver = None
+_driver_lock = threading.Lock()
+
+
+def get_neo4j_driver():
+    """
+    Retourne le driver Neo4j partagé, créé à la première demande.
+    La connectivité n'est vérifiée qu'une seule fois, à la création.
+    """
+    global _driver
+    if _driver is not None:
+        return _driver
+    with _driver_lock:
+        if _driver is None:
+            try:
+                driver = GraphDatabase.driver(
+                    NEO4J_URI,
+                    auth=(NEO4J_USER, NEO4J_PASSWORD),
+                    max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+                    max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME,
+                )
+                driver.verify_connectivity()
+                print("Connexion Neo4j réussie.")
+                _driver = driver
+            except Exception as e:
+                print("Erreur de connexion Neo4j :", e)
+                raise
+    return _driver
+
+def close_neo4j_driver():
+    """Ferme le driver Neo4j partagé (appelé automatiquement à la sortie du processus)."""
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+
+atexit.register(close_neo4j_driver)
+
+# Version des données Neo4j, partagée entre processus (cf. query_cache)
+def read_data_version():
+    with get_neo4j_driver().session() as session:
+        record = session.run("MATCH (m:Meta {name: 'DATA_VERSION'}) RETURN m.version AS version").single()
+        return record["version"] if record else 0
+
+def bump_data_version():
+    query = """
+    MERGE (m:Meta {name: 'DATA_VERSION'})
+    SET m.version = coalesce(m.version, 0) + 1
+    RETURN m.version AS version
+    """
+    with get_neo4j_driver().session() as session:
+        return session.execute_write(lambda tx: tx.run(query).single()["version"])
+
+register_version_store(read_data_version, bump_data_version)
+
+# Version du graphe acteurs-films : incrémentée par chaque écriture de relations A_JOUE_DANS,
+# elle permet aux données dérivées (moteur en mémoire, communautés) de savoir s'il a changé.
+def read_actor_graph_version(driver=None):
+    with (driver or get_neo4j_driver()).session() as session:
+        record = session.run("MATCH (m:Meta {name: 'ACTOR_GRAPH'}) RETURN m.version AS version").single()
+        return record["version"] if record else 0
+
+def _loaded_graph_engine():
+    # Import local : les scripts d'export n'ont pas à charger NumPy
+    from graph_engine import get_loaded_graph_engine
+    return get_loaded_graph_engine()
+
+def batched(iterable, size):
+    """Découpe un itérable en listes de taille `size` (la dernière peut être plus courte)."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def group_actors_by_film(relations):
+    """
+    Regroupe des relations {actor, film_id} consécutives par film : {film_id, actors}.
+    get_actor_film_relations() produit les acteurs d'un même film à la suite.
+    """
+    current_id = None
+    actors = []
+    for rel in relations:
+        film_id = str(rel["film_id"])
+        if film_id != current_id:
+            if actors:
+                yield {"film_id": current_id, "actors": actors}
+            current_id = film_id
+            actors = []
+        actors.append(rel["actor"])
+    if actors:
+        yield {"film_id": current_id, "actors": actors}
+
+
+class ShortestPathTimeout(Exception):
+    """Plus court chemin abandonné après le délai maximal (erreur transitoire, jamais mise en cache)."""
+
 
 class Neo4jConnector:
+    """
+    Fabrique de sessions légère au-dessus du driver partagé :
+    l'instancier ne crée ni connexion ni handshake.
+    """
     def __init__(self):
-        try:
-            self.driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-            # Test de connexion rapide
-            with self.driver.session() as session:
-                session.run("RETURN 1")
-            print("Connexion Neo4j réussie.")
-        except Exception as e:
-            print("Erreur de connexion Neo4j :", e)
-            raise
+        self.driver = get_neo4j_driver()
+
+    def session(self, **kwargs):
+        return self.driver.session(**kwargs)
 
     def close(self):
-        self.driver.close()
+        # Le driver est partagé : il est fermé par close_neo4j_driver() à la sortie.
+        pass
 
+    def ensure_constraints(self):
+        """
+        Crée les contraintes d'unicité et index utilisés par les MERGE / MATCH (idempotent).
+        """
+        statements = [
+            "CREATE CONSTRAINT film_id IF NOT EXISTS FOR (f:Film) REQUIRE f.id IS UNIQUE",
+            "CREATE CONSTRAINT actor_name IF NOT EXISTS FOR (a:Actor) REQUIRE a.name IS UNIQUE",
+            "CREATE CONSTRAINT realisateur_name IF NOT EXISTS FOR (r:Realisateur) REQUIRE r.name IS UNIQUE",
+            "CREATE CONSTRAINT genre_name IF NOT EXISTS FOR (g:Genre) REQUIRE g.name IS UNIQUE",
+            "CREATE INDEX film_title IF NOT EXISTS FOR (f:Film) ON (f.title)",
+        ]
+        with self.driver.session() as session:
+            for statement in statements:
+                try:
+                    session.run(statement).consume()
+                except Exception as e:
+                    print("Erreur création contrainte/index Neo4j :", statement, "->", e)
+        print(f"{len(statements)} contraintes/index Neo4j vérifiés.")
+
+    @invalidates_cache
     def create_film_node(self, film):
         """
         Crée un noeud Film dans Neo4j.
@@ -48,6 +178,253 @@ class Neo4jConnector:
         with self.driver.session() as session:
             session.run(query, **film)
 
+    def get_actor_graph_version(self):
+        return read_actor_graph_version(self.driver)
+
+    def _actor_relations_changed(self):
+        """À appeler après toute écriture de relations A_JOUE_DANS."""
+        query = """
+        MERGE (m:Meta {name: 'ACTOR_GRAPH'})
+        SET m.version = coalesce(m.version, 0) + 1
+        """
+        with self.driver.session() as session:
+            session.run(query).consume()
+
+    def _write_batches(self, query, rows, batch_size=None, label="lignes", on_batch=None, before_batch=None, **params):
+        """
+        Envoie `rows` par lots via `UNWIND $rows`, chaque lot dans une seule transaction.
+        `before_batch(batch)` est appelé avant l'écriture de chaque lot, `on_batch(batch)` après
+        sa validation (ex. checkpoint).
+        Retourne le nombre de lignes écrites et affiche le débit (lignes/s).
+        """
+        batch_size = batch_size or NEO4J_BATCH_SIZE
+        total = 0
+        start = time.perf_counter()
+        with self.driver.session() as session:
+            for batch in batched(rows, batch_size):
+                if before_batch is not None:
+                    before_batch(batch)
+                session.execute_write(lambda tx, b=batch: tx.run(query, rows=b, **params).consume())
+                total += len(batch)
+                if on_batch is not None:
+                    on_batch(batch)
+        elapsed = time.perf_counter() - start
+        rate = total / elapsed if elapsed > 0 else 0
+        print(f"{total} {label} écrites en {elapsed:.2f}s ({rate:.0f} lignes/s).")
+        return total
+
+    @invalidates_cache
+    def create_film_nodes(self, films, batch_size=None):
+        """
+        Crée (ou met à jour) des noeuds Film en masse.
+        films est un itérable de dictionnaires au même format que create_film_node.
+        """
+        query = """
+        UNWIND $rows AS row
+        MERGE (f:Film {id: row.id})
+        SET f.title = row.title,
+            f.year = row.year,
+            f.votes = row.votes,
+            f.revenue = row.revenue,
+            f.rating = row.rating,
+            f.director = row.director,
+            f.genre = row.genre
+        FOREACH (name IN [g IN split(coalesce(row.genre, ""), ",") WHERE trim(g) <> "" | trim(g)] |
+            MERGE (g:Genre {name: name})
+            MERGE (f)-[:A_POUR_GENRE]->(g))
+        """
+        return self._write_batches(query, films, batch_size, label="films")
+
+    @invalidates_cache
+    def sync_film_bundles(self, bundles, batch_size=None, replace_relations=False, on_batch=None):
+        """
+        Écrit en masse des "paquets" par film : {film, actors, directors, genres}.
+        Film, Actor, Realisateur, Genre, A_JOUE_DANS, A_REALISE et A_POUR_GENRE sont créés
+        dans la même transaction par lot.
+        Avec replace_relations=True, les anciennes relations du film sont d'abord supprimées
+        (utile quand un film modifié a perdu des acteurs, réalisateurs ou genres).
+        La projection CO_JOUE, si elle existe, est mise à jour lot par lot.
+        """
+        replace_clause = """
+        WITH f, row
+        OPTIONAL MATCH (f)-[old:A_JOUE_DANS|A_REALISE|A_POUR_GENRE]-()
+        DELETE old
+        WITH DISTINCT f, row
+        """ if replace_relations else ""
+        query = """
+        UNWIND $rows AS row
+        MERGE (f:Film {id: row.film.id})
+        SET f += row.film
+        """ + replace_clause + """
+        FOREACH (name IN row.actors |
+            MERGE (a:Actor {name: name})
+            MERGE (a)-[:A_JOUE_DANS]->(f))
+        FOREACH (name IN row.directors |
+            MERGE (r:Realisateur {name: name})
+            MERGE (r)-[:A_REALISE]->(f))
+        FOREACH (name IN row.genres |
+            MERGE (g:Genre {name: name})
+            MERGE (f)-[:A_POUR_GENRE]->(g))
+        """
+        before_batch, after_batch = None, on_batch
+        if self.has_coactor_projection():
+            def film_ids(batch):
+                return [bundle["film"]["id"] for bundle in batch]
+
+            def remove_old_pairs(batch):
+                self._remove_coactor_films(film_ids(batch))
+
+            def merge_new_pairs(batch):
+                self._merge_coactor_relations(film_ids(batch))
+                if on_batch is not None:
+                    on_batch(batch)
+
+            if replace_relations:
+                # Avant la suppression des anciennes relations : les paires se retrouvent par l'ancien casting
+                before_batch = remove_old_pairs
+            after_batch = merge_new_pairs
+        try:
+            return self._write_batches(
+                query, bundles, batch_size, label="films synchronisés",
+                on_batch=after_batch, before_batch=before_batch,
+            )
+        finally:
+            self._actor_relations_changed()
+
+    @invalidates_cache
+    def delete_films(self, film_ids, batch_size=None):
+        """Supprime des noeuds Film et toutes leurs relations (films retirés de MongoDB)."""
+        query = """
+        UNWIND $rows AS film_id
+        MATCH (f:Film {id: film_id})
+        DETACH DELETE f
+        """
+        before_batch = self._remove_coactor_films if self.has_coactor_projection() else None
+        try:
+            return self._write_batches(query, film_ids, batch_size, label="films supprimés", before_batch=before_batch)
+        finally:
+            self._actor_relations_changed()
+
+    @cached_query(method=True)
+    def has_coactor_projection(self):
+        """Indique si la projection CO_JOUE a été construite (marqueur posé par build_coactor_relations)."""
+        query = "MATCH (p:Projection {name: 'CO_JOUE'}) RETURN p.built_at AS built_at"
+        with self.driver.session() as session:
+            return session.run(query).single() is not None
+
+    @invalidates_cache
+    def build_coactor_relations(self, batch_size=None):
+        """
+        Construit la projection (:Actor)-[:CO_JOUE {count, films, film_ids}]->(:Actor)
+        (du plus petit nom vers le plus grand), par lots de films.
+        Reconstruction complète : les anciennes relations CO_JOUE sont supprimées d'abord.
+        """
+        with self.driver.session() as session:
+            session.run("MATCH (p:Projection {name: 'CO_JOUE'}) DELETE p").consume()
+            session.run("""
+            MATCH ()-[c:CO_JOUE]->()
+            CALL { WITH c DELETE c } IN TRANSACTIONS OF 10000 ROWS
+            """).consume()
+            film_ids = [r["id"] for r in session.run("MATCH (f:Film) RETURN f.id AS id")]
+        count = self._merge_coactor_relations(film_ids, batch_size)
+        with self.driver.session() as session:
+            session.run("MERGE (p:Projection {name: 'CO_JOUE'}) SET p.built_at = datetime()").consume()
+        return count
+
+    @invalidates_cache
+    def update_coactor_relations(self, film_ids, batch_size=None):
+        """
+        Mise à jour incrémentale de CO_JOUE pour des films dont les relations A_JOUE_DANS
+        viennent d'être ajoutées. Idempotente : un film déjà compté sur une paire est ignoré.
+        Appelée par chaque écriture de relations A_JOUE_DANS (les retraits passent par
+        _remove_coactor_films).
+        """
+        if not self.has_coactor_projection():
+            return 0
+        return self._merge_coactor_relations(film_ids, batch_size)
+
+    def _remove_coactor_films(self, film_ids, batch_size=None):
+        """
+        Retire des films de la projection CO_JOUE (avant remplacement de leur casting ou
+        suppression) ; les paires dont le compteur tombe à 0 sont supprimées.
+        """
+        query = """
+        UNWIND $rows AS film_id
+        MATCH (:Film {id: film_id})<-[:A_JOUE_DANS]-(:Actor)-[c:CO_JOUE]-(:Actor)
+        WHERE film_id IN c.film_ids
+        WITH c, collect(DISTINCT film_id) AS removed
+        WITH c, [i IN range(0, size(c.film_ids) - 1) WHERE NOT c.film_ids[i] IN removed] AS keep
+        SET c.films = [i IN keep | c.films[i]],
+            c.film_ids = [i IN keep | c.film_ids[i]],
+            c.count = size(keep)
+        WITH c
+        WHERE c.count = 0
+        DELETE c
+        """
+        return self._write_batches(query, film_ids, batch_size, label="films retirés (projection CO_JOUE)")
+
+    def _merge_coactor_relations(self, film_ids, batch_size=None):
+        query = """
+        UNWIND $rows AS film_id
+        MATCH (f:Film {id: film_id})<-[:A_JOUE_DANS]-(a1:Actor)
+        MATCH (f)<-[:A_JOUE_DANS]-(a2:Actor)
+        WHERE a1.name < a2.name
+        MERGE (a1)-[c:CO_JOUE]->(a2)
+        ON CREATE SET c.film_ids = [], c.films = []
+        WITH c, f
+        WHERE NOT f.id IN c.film_ids
+        SET c.film_ids = c.film_ids + f.id,
+            c.films = c.films + f.title
+        SET c.count = size(c.film_ids)
+        """
+        return self._write_batches(query, film_ids, batch_size, label="films (projection CO_JOUE)")
+
+    def get_communities_graph_version(self):
+        """Version du graphe acteurs-films lors du dernier calcul des communautés (ou None)."""
+        query = "MATCH (p:Projection {name: 'COMMUNITIES'}) RETURN p.graph_version AS graph_version"
+        with self.driver.session() as session:
+            result = session.run(query).single()
+            return result["graph_version"] if result else None
+
+    @cached_query(method=True)
+    def get_actor_communities(self):
+        query = """
+        MATCH (a:Actor)
+        WHERE a.community IS NOT NULL
+        RETURN a.name AS actor, a.community AS community
+        """
+        with self.driver.session() as session:
+            return {r["actor"]: r["community"] for r in session.run(query)}
+
+    @invalidates_cache
+    def store_actor_communities(self, communities, graph_version, batch_size=None):
+        """
+        Stocke {acteur: communauté} dans Actor.community, par lots, avec la version du graphe
+        acteurs-films (get_actor_graph_version) sur laquelle elles ont été calculées.
+        """
+        with self.driver.session() as session:
+            session.run("""
+            MATCH (a:Actor) WHERE a.community IS NOT NULL
+            CALL { WITH a REMOVE a.community } IN TRANSACTIONS OF 10000 ROWS
+            """).consume()
+        query = """
+        UNWIND $rows AS row
+        MATCH (a:Actor {name: row.actor})
+        SET a.community = row.community
+        """
+        rows = ({"actor": actor, "community": community} for actor, community in communities.items())
+        count = self._write_batches(query, rows, batch_size, label="communautés d'acteurs")
+        with self.driver.session() as session:
+            session.run(
+                """
+                MERGE (p:Projection {name: 'COMMUNITIES'})
+                SET p.graph_version = $graph_version, p.built_at = datetime()
+                """,
+                graph_version=graph_version,
+            ).consume()
+        return count
+
+    @cached_query(method=True)
     def find_top_actor(self):
         """
         Exemple de requête Cypher pour trouver l'acteur qui a joué dans le plus grand nombre de films.
@@ -63,6 +440,7 @@ class Neo4jConnector:
             result = session.run(query)
             return result.single()
         
+    @invalidates_cache
     def create_actor_node(self, actor_name):
         """
         Crée un noeud Actor si non existant.
@@ -71,30 +449,49 @@ class Neo4jConnector:
         with self.driver.session() as session:
             session.run(query, name=actor_name)
 
+    @invalidates_cache
     def create_actor_film_relation(self, actor_name, film_id):
         """
         Crée une relation (:Actor)-[:A_JOUE_DANS]->(:Film)
         """
-        collection = get_films_collection()
-        films = []
-
-        for film in collection.find():
-            if "actors" in film and film["actors"]:  # S'assure qu'il y a des acteurs
-                films.append({
-                    "id": str(film["id"]),
-                    "actors": film["actors"]
-                })
+        query = """
+        MATCH (a:Actor {name: $name})
+        MATCH (f:Film {id: $film_id})
+        MERGE (a)-[:A_JOUE_DANS]->(f)
+        """
+        with self.driver.session() as session:
+            session.run(query, name=actor_name, film_id=str(film_id))
+        self.update_coactor_relations([str(film_id)])
+        self._actor_relations_changed()
 
+    @invalidates_cache
+    def create_actor_film_relations(self, relations, batch_size=None):
+        """
+        Crée en masse les relations (:Actor)-[:A_JOUE_DANS]->(:Film).
+        relations est la sortie de get_actor_film_relations() : des dicts {actor, film_id}.
+        Les relations sont regroupées par film pour ne faire qu'un MATCH de Film par film.
+        La projection CO_JOUE, si elle existe, est mise à jour lot par lot.
+        """
         query = """
-        UNWIND $actors AS actor_name
+        UNWIND $rows AS row
+        MATCH (f:Film {id: row.film_id})
+        UNWIND row.actors AS actor_name
         MATCH (a:Actor {name: actor_name})
-        MATCH (f:Film {id: $film_id})
         MERGE (a)-[:A_JOUE_DANS]->(f)
         """
+        def merge_new_pairs(batch):
+            self._merge_coactor_relations([row["film_id"] for row in batch])
 
-        with self.driver.session() as session:
-            session.run(query, actors=[actor_name], film_id=film_id)
-    
+        on_batch = merge_new_pairs if self.has_coactor_projection() else None
+        try:
+            return self._write_batches(
+                query, group_actors_by_film(relations), batch_size,
+                label="films (relations A_JOUE_DANS)", on_batch=on_batch,
+            )
+        finally:
+            self._actor_relations_changed()
+
+    @invalidates_cache
     def add_project_member_as_actor(self, member_name, film_id):
         """
         Ajoute un membre de l'équipe en tant qu'acteur fictif lié à un film.
@@ -107,7 +504,10 @@ class Neo4jConnector:
         """
         with self.driver.session() as session:
             session.run(query, name=member_name, film_id=film_id)
+        self.update_coactor_relations([film_id])
+        self._actor_relations_changed()
 
+    @invalidates_cache
     def create_director_node(self, name):
         """
         Crée un nœud Realisateur si non existant.
@@ -116,6 +516,7 @@ class Neo4jConnector:
         with self.driver.session() as session:
             session.run(query, name=name)
 
+    @invalidates_cache
     def create_director_film_relation(self, director_name, film_id):
         """
         Crée une relation (:Realisateur)-[:A_REALISE]->(:Film)
@@ -129,6 +530,7 @@ class Neo4jConnector:
             session.run(query, name=director_name, film_id=film_id)
 
 
+    @cached_query(method=True)
     def get_top_actor_alt(self):
         """
         Variante : retourne l'acteur qui a joué dans le plus de films.
@@ -149,16 +551,26 @@ class Neo4jConnector:
                 }
             return None
 
+    @cached_query(method=True)
     def get_coactors_of(self, actor_name):
+        engine = _loaded_graph_engine()
+        if engine is not None:
+            return engine.coactors_of(actor_name)
         query = """
         MATCH (a:Actor {name: $name})-[:A_JOUE_DANS]->(f:Film)<-[:A_JOUE_DANS]-(co:Actor)
         WHERE co.name <> $name
         RETURN DISTINCT co.name AS CoActeur
         """
+        if self.has_coactor_projection():
+            query = """
+            MATCH (:Actor {name: $name})-[:CO_JOUE]-(co:Actor)
+            RETURN co.name AS CoActeur
+            """
         with self.driver.session() as session:
             result = session.run(query, name=actor_name)
             return [record["CoActeur"] for record in result]
 
+    @cached_query(method=True)
     def get_actor_highest_total_revenue(self):
         query = """
         MATCH (a:Actor)-[:A_JOUE_DANS]->(f:Film)
@@ -172,6 +584,7 @@ class Neo4jConnector:
             result = session.run(query).single()
             return result.data() if result else None
 
+    @cached_query(method=True)
     def get_avg_votes(self):
         query = """
         MATCH (f:Film)
@@ -182,6 +595,7 @@ class Neo4jConnector:
             result = session.run(query).single()
             return result["MoyenneVotes"] if result else None
 
+    @cached_query(method=True)
     def get_votes_per_film(self):
         query = """
         MATCH (f:Film)
@@ -193,12 +607,11 @@ class Neo4jConnector:
             results = session.run(query)
             return [{"title": r["title"], "votes": r["votes"]} for r in results]
 
+    @cached_query(method=True)
     def get_most_common_genre(self):
         query = """
-        MATCH (f:Film)
-        WHERE f.genre IS NOT NULL
-        UNWIND split(f.genre, ",") AS g
-        RETURN trim(g) AS genre, count(*) AS occurrences
+        MATCH (g:Genre)<-[r:A_POUR_GENRE]-(:Film)
+        RETURN g.name AS genre, count(r) AS occurrences
         ORDER BY occurrences DESC
         LIMIT 1
         """
@@ -206,7 +619,11 @@ class Neo4jConnector:
             result = session.run(query).single()
             return result if result else None
 
+    @cached_query(method=True)
     def get_films_of_my_coactors(self, member_name):
+        engine = _loaded_graph_engine()
+        if engine is not None:
+            return engine.films_of_coactors(member_name)
         query = """
         MATCH (me:Actor {name: $member_name})-[:A_JOUE_DANS]->(:Film)<-[:A_JOUE_DANS]-(co:Actor)
         WITH DISTINCT co
@@ -214,10 +631,18 @@ class Neo4jConnector:
         RETURN DISTINCT f.title AS film, f.year AS year
         ORDER BY f.year DESC
         """
+        if self.has_coactor_projection():
+            query = """
+            MATCH (:Actor {name: $member_name})-[:CO_JOUE]-(co:Actor)
+            MATCH (co)-[:A_JOUE_DANS]->(f:Film)
+            RETURN DISTINCT f.title AS film, f.year AS year
+            ORDER BY f.year DESC
+            """
         with self.driver.session() as session:
             result = session.run(query, member_name=member_name)
             return [{"title": record["film"], "year": record["year"]} for record in result]
 
+    @cached_query(method=True)
     def get_director_with_most_actors(self):
         query = """
         MATCH (r:Realisateur)-[:A_REALISE]->(f:Film)<-[:A_JOUE_DANS]-(a:Actor)
@@ -232,7 +657,11 @@ class Neo4jConnector:
                 "nb_acteurs": result["nb_acteurs"]
             } if result else None
 
+    @cached_query(method=True)
     def get_most_connected_films(self, limit=10):
+        engine = _loaded_graph_engine()
+        if engine is not None:
+            return engine.most_connected_films(limit)
         query = """
         MATCH (f1:Film)<-[:A_JOUE_DANS]-(a:Actor)-[:A_JOUE_DANS]->(f2:Film)
         WHERE f1 <> f2
@@ -245,6 +674,7 @@ class Neo4jConnector:
             results = session.run(query, limit=limit)
             return [record["film"] for record in results]
 
+    @cached_query(method=True)
     def get_actors_with_most_directors(self, limit=5):
         query = """
         MATCH (a:Actor)-[:A_JOUE_DANS]->(f:Film)
@@ -258,62 +688,140 @@ class Neo4jConnector:
             results = session.run(query, limit=limit)
             return [{"acteur": r["Acteur"], "nb_realisateurs": r["NbRealisateurs"]} for r in results]
 
+    @cached_query(method=True)
     def recommend_film_to_actor(self, actor_name):
+        reco = self.recommend_films_based_on_actor_preferences(actor_name, k=1)
+        if reco:
+            return {
+                "titre": reco[0]["Titre"],
+                "genres": reco[0]["Genres"],
+                "note": reco[0]["Note"]
+            }
+        return None
+
+    @cached_query(method=True)
+    def get_actor_genres(self, actor_name):
         query = """
-        MATCH (a:Actor {name: $name})-[:A_JOUE_DANS]->(f:Film)
-        UNWIND split(f.genre, ",") AS g
-        WITH a, collect(DISTINCT trim(g)) AS GenresPref
-        MATCH (rec:Film)
-        WHERE ANY(genre IN GenresPref WHERE rec.genre CONTAINS genre)
-        AND NOT (a)-[:A_JOUE_DANS]->(rec)
-        RETURN rec.title AS FilmRecommande, rec.genre AS Genres, rec.rating AS Rating
-        ORDER BY rec.rating DESC
-        LIMIT 1
+        MATCH (:Actor {name: $name})-[:A_JOUE_DANS]->(:Film)-[:A_POUR_GENRE]->(g:Genre)
+        RETURN collect(DISTINCT g.name) AS genres
         """
         with self.driver.session() as session:
             result = session.run(query, name=actor_name).single()
-            if result:
-                return {
-                    "titre": result["FilmRecommande"],
-                    "genres": result["Genres"],
-                    "note": result["Rating"]
-                }
-            return None
+            return result["genres"] if result else []
 
-    def create_directors_influence_relations(self):
+    @invalidates_cache
+    def store_recommendations(self, rows, graph_version, k, batch_size=None):
+        """
+        Remplace les relations (:Actor)-[:RECOMMANDE {rang}]->(:Film) par `rows`
+        (dicts {actor, film_id, rang}, cf. GenreRecommender.recommend_all), calculées
+        pour `k` films par acteur sur la version `graph_version` du graphe acteurs-films.
+        """
+        with self.driver.session() as session:
+            # Marqueur retiré d'abord : un remplacement interrompu n'est jamais lu
+            session.run("MATCH (p:Projection {name: 'RECOMMANDE'}) DELETE p").consume()
+            session.run("""
+            MATCH ()-[r:RECOMMANDE]->()
+            CALL { WITH r DELETE r } IN TRANSACTIONS OF 10000 ROWS
+            """).consume()
         query = """
-        MATCH (d1:Realisateur)-[:A_REALISE]->(f1:Film)-[:A_POUR_GENRE]->(g1:Genre)
-        WITH d1, COLLECT(DISTINCT g1.name) AS genres_d1
-        MATCH (d2:Realisateur)-[:A_REALISE]->(f2:Film)-[:A_POUR_GENRE]->(g2:Genre)
-        WITH d1, d2, genres_d1, COLLECT(DISTINCT g2.name) AS genres_d2
-        WITH d1, d2, genres_d1, genres_d2
-        WHERE size(apoc.coll.intersection(genres_d1, genres_d2)) > 2  
-        MERGE (d1)-[:INFLUENCE_PAR]->(d2)
-        MERGE (d2)-[:INFLUENCE_PAR]->(d1)
+        UNWIND $rows AS row
+        MATCH (a:Actor {name: row.actor})
+        MATCH (f:Film {id: row.film_id})
+        MERGE (a)-[r:RECOMMANDE]->(f)
+        SET r.rang = row.rang
         """
+        count = self._write_batches(query, rows, batch_size, label="recommandations")
         with self.driver.session() as session:
-            session.run(query)
+            session.run(
+                """
+                MERGE (p:Projection {name: 'RECOMMANDE'})
+                SET p.graph_version = $graph_version, p.k = $k, p.built_at = datetime()
+                """,
+                graph_version=graph_version, k=k,
+            ).consume()
+        return count
+
+    @invalidates_cache
+    def create_directors_influence_relations(self, threshold=None, measure="overlap", batch_size=None):
+        """
+        Crée (d1)-[:INFLUENCE_PAR]->(d2) dans les deux sens entre réalisateurs dont la
+        similarité de genres dépasse `threshold` (par défaut : plus de 2 genres en commun,
+        ou Jaccard > 0,5). measure : "overlap" (genres communs) ou "jaccard". Les genres de chaque réalisateur
+        sont lus une seule fois ; les paires sont calculées en NumPy (sans APOC), puis
+        écrites par lots.
+        """
+        from director_influence import similar_director_pairs
 
-
-
-    def get_shortest_path_between_actors(self, actor1, actor2):
         query = """
-        MATCH (a1:Actor {name: $actor1}), (a2:Actor {name: $actor2})
-        MATCH p = allShortestPaths((a1)-[:A_JOUE_DANS|A_REALISE*]-(a2))
-        RETURN p
-        LIMIT 1
+        MATCH (d:Realisateur)-[:A_REALISE]->(:Film)-[:A_POUR_GENRE]->(g:Genre)
+        RETURN d.name AS director, collect(DISTINCT g.name) AS genres
         """
         with self.driver.session() as session:
-            result = session.run(query, actor1=actor1, actor2=actor2).single()
-            return result["p"] if result else None
+            director_genres = {r["director"]: r["genres"] for r in session.run(query)}
+
+        write_query = """
+        UNWIND $rows AS row
+        MATCH (d1:Realisateur {name: row.d1})
+        MATCH (d2:Realisateur {name: row.d2})
+        MERGE (d1)-[i1:INFLUENCE_PAR]->(d2)
+        MERGE (d2)-[i2:INFLUENCE_PAR]->(d1)
+        SET i1.similarity = row.similarity, i2.similarity = row.similarity
+        """
+        rows = (
+            {"d1": d1, "d2": d2, "similarity": similarity}
+            for d1, d2, similarity in similar_director_pairs(director_genres, threshold, measure)
+        )
+        return self._write_batches(write_query, rows, batch_size, label="paires INFLUENCE_PAR")
+
+    def get_shortest_path_between_actors(self, actor1, actor2, max_hops=None):
+        """Variante qui ne retourne que le chemin (ou None, y compris si le délai est dépassé)."""
+        try:
+            result = self.find_shortest_path_between_actors(actor1, actor2, max_hops)
+        except ShortestPathTimeout as e:
+            print(e)
+            return None
+        return result["path"] if result else None
 
+    @cached_query(method=True)
+    def find_shortest_path_between_actors(self, actor1, actor2, max_hops=None, timeout=None):
+        """
+        Plus court chemin unique entre deux acteurs, borné à `max_hops` relations.
+        shortestPath est résolu par un parcours en largeur bidirectionnel et s'arrête au
+        premier chemin trouvé (contrairement à allShortestPaths qui les énumère tous).
+        Retourne {"path", "length"} (chemin de longueur 0 si actor1 == actor2), ou None si
+        aucun chemin dans la borne. Lève ShortestPathTimeout si la requête dépasse `timeout`
+        secondes : ce cas n'est pas mis en cache.
+        """
+        if actor1 == actor2:
+            # shortestPath refuse un chemin d'un noeud vers lui-même
+            query = "MATCH p = (:Actor {name: $actor1}) RETURN p, 0 AS length"
+            with self.driver.session() as session:
+                result = session.run(query, actor1=actor1).single()
+            return {"path": result["p"], "length": result["length"]} if result else None
+
+        max_hops = int(max_hops or SHORTEST_PATH_MAX_HOPS)
+        # La borne d'un motif de longueur variable ne peut pas être un paramètre Cypher
+        query = Query(f"""
+        MATCH (a1:Actor {{name: $actor1}}), (a2:Actor {{name: $actor2}})
+        MATCH p = shortestPath((a1)-[:A_JOUE_DANS|A_REALISE*..{max_hops}]-(a2))
+        RETURN p, length(p) AS length
+        """, timeout=timeout or SHORTEST_PATH_TIMEOUT)
+        try:
+            with self.driver.session() as session:
+                result = session.run(query, actor1=actor1, actor2=actor2).single()
+        except ClientError as e:
+            if "Timeout" not in (e.code or "") and "TimedOut" not in (e.code or ""):
+                raise
+            raise ShortestPathTimeout(f"Plus court chemin {actor1} -> {actor2} : délai dépassé ({e.code}).") from e
+        return {"path": result["p"], "length": result["length"]} if result else None
+
+    @cached_query(method=True)
     def get_films_with_common_genres_and_different_directors(self):
+        # Jointure par les noeuds Genre : seuls les films d'un même genre sont comparés
         query = """
-        MATCH (f1:Film), (f2:Film)
+        MATCH (f1:Film)-[:A_POUR_GENRE]->(:Genre)<-[:A_POUR_GENRE]-(f2:Film)
         WHERE f1 <> f2
         AND f1.director <> f2.director
-        AND ANY(genre IN split(f1.genre, ",") 
-                WHERE trim(genre) IN split(f2.genre, ","))
         RETURN DISTINCT f1.title AS Film1, f2.title AS Film2
         LIMIT 1000
         """
@@ -322,40 +830,97 @@ class Neo4jConnector:
             return [record.data() for record in results]
 
 
-    def recommend_films_based_on_actor_preferences(self, actor_name):
+    @cached_query(method=True)
+    def recommend_films_based_on_actor_preferences(self, actor_name, k=5):
+        """
+        Top k films des genres préférés de l'acteur. Lecture directe des recommandations
+        précalculées (relations RECOMMANDE, cf. recommendations.py) si elles sont à jour
+        (même version du graphe acteurs-films) et couvrent k, sinon calcul à la volée par
+        les noeuds Genre (seuls les films des genres de l'acteur sont examinés).
+        """
+        marker_query = """
+        MATCH (p:Projection {name: 'RECOMMANDE'})
+        RETURN p.graph_version AS graph_version, p.k AS k
+        """
+        stored_query = """
+        MATCH (:Actor {name: $name})-[r:RECOMMANDE]->(rec:Film)
+        RETURN rec.title AS Titre, rec.genre AS Genres, rec.rating AS Note
+        ORDER BY r.rang
+        LIMIT $k
+        """
         query = """
-        MATCH (a:Actor {name: $name})-[:A_JOUE_DANS]->(f:Film)
-        UNWIND split(f.genre, ",") AS g
-        WITH a, collect(DISTINCT trim(g)) AS GenresPref
-        MATCH (rec:Film)
-        WHERE ANY(genre IN GenresPref WHERE rec.genre CONTAINS genre)
-        AND NOT (a)-[:A_JOUE_DANS]->(rec)
-        AND rec.rating IS NOT NULL
+        MATCH (:Actor {name: $name})-[:A_JOUE_DANS]->(f:Film)
+        WITH collect(f) AS played
+        UNWIND played AS f
+        MATCH (f)-[:A_POUR_GENRE]->(g:Genre)
+        WITH played, collect(DISTINCT g) AS genres
+        UNWIND genres AS g
+        MATCH (g)<-[:A_POUR_GENRE]-(rec:Film)
+        WHERE rec.rating IS NOT NULL AND NOT rec IN played
+        WITH DISTINCT rec
         RETURN rec.title AS Titre, rec.genre AS Genres, rec.rating AS Note
         ORDER BY rec.rating DESC
-        LIMIT 5
+        LIMIT $k
         """
         with self.driver.session() as session:
-            result = session.run(query, name=actor_name)
+            marker = session.run(marker_query).single()
+            stored_is_fresh = (
+                marker is not None
+                and marker["k"] is not None and k <= marker["k"]
+                and marker["graph_version"] == read_actor_graph_version(self.driver)
+            )
+            if stored_is_fresh:
+                result = [record.data() for record in session.run(stored_query, name=actor_name, k=k)]
+                if result:
+                    return result
+            result = session.run(query, name=actor_name, k=k)
             return [record.data() for record in result]
 
-
-
-    def create_director_competition_relations(self):
+    @invalidates_cache
+    def create_director_competition_relations(self, batch_size=None):
+        """
+        Crée (d1:Realisateur)-[:CONCURRENCE]->(d2:Realisateur) (d1.name < d2.name) pour les
+        réalisateurs ayant sorti un film la même année dans un même genre.
+        Les films sont regroupés en paquets (année, genre) : seuls les réalisateurs d'un même
+        paquet sont comparés, puis les relations sont écrites par lots de transactions.
+        """
+        # Genres lus dans les noeuds Genre (même découpage que la synchronisation)
         query = """
-        MATCH (d1:Realisateur)-[:A_REALISE]->(f1:Film),
-            (d2:Realisateur)-[:A_REALISE]->(f2:Film)
-        WHERE d1 <> d2
-        AND f1.year = f2.year
-        AND d1.name < d2.name
-        AND ANY(genre IN split(f1.genre, ",") WHERE genre IN split(f2.genre, ","))
-        MERGE (d1)-[:CONCURRENCE]->(d2)
+        MATCH (d:Realisateur)-[:A_REALISE]->(f:Film)-[:A_POUR_GENRE]->(g:Genre)
+        WHERE f.year IS NOT NULL
+        RETURN DISTINCT f.year AS year, g.name AS genre, d.name AS director
         """
+        buckets = {}
         with self.driver.session() as session:
-            session.run(query)
+            for record in session.run(query):
+                buckets.setdefault((record["year"], record["genre"]), set()).add(record["director"])
+
+        pairs = set()
+        for directors in buckets.values():
+            if len(directors) > 1:
+                names = sorted(directors)
+                for i, d1 in enumerate(names):
+                    for d2 in names[i + 1:]:
+                        pairs.add((d1, d2))
+        print(f"{len(buckets)} paquets (année, genre), {len(pairs)} paires de réalisateurs en concurrence.")
+
+        write_query = """
+        UNWIND $rows AS row
+        MATCH (d1:Realisateur {name: row.d1})
+        MATCH (d2:Realisateur {name: row.d2})
+        MERGE (d1)-[:CONCURRENCE]->(d2)
+        """
+        total = len(pairs)
+        written = [0]
 
+        def progress(batch):
+            written[0] += len(batch)
+            print(f"CONCURRENCE : {written[0]}/{total} relations écrites.")
 
+        rows = ({"d1": d1, "d2": d2} for d1, d2 in pairs)
+        return self._write_batches(write_query, rows, batch_size, label="relations CONCURRENCE", on_batch=progress)
 
+    @cached_query(method=True)
     def get_director_actor_collaborations(self):
         query = """
         MATCH (d:Realisateur)-[:A_REALISE]->(f:Film)<-[:A_JOUE_DANS]-(a:Actor)
@@ -374,16 +939,32 @@ class Neo4jConnector:
             results = session.run(query)
             return [record.data() for record in results]
         
+    @cached_query(method=True)
     def get_actor_edges_for_communities(self):
+        engine = _loaded_graph_engine()
+        if engine is not None:
+            return engine.coactor_pairs()
+        return list(self.iter_actor_edges())
+
+    def iter_actor_edges(self):
+        """
+        Paires de co-acteurs (acteur1 < acteur2) lues en flux depuis Neo4j, sans cache ni
+        moteur en mémoire : reflète toujours l'état courant du graphe.
+        """
         query = """
         MATCH (a1:Actor)-[:A_JOUE_DANS]->(f:Film)<-[:A_JOUE_DANS]-(a2:Actor)
         WHERE a1.name < a2.name
         RETURN DISTINCT a1.name AS actor1, a2.name AS actor2
         """
+        if self.has_coactor_projection():
+            # Les relations CO_JOUE vont toujours du plus petit nom vers le plus grand
+            query = """
+            MATCH (a1:Actor)-[:CO_JOUE]->(a2:Actor)
+            RETURN a1.name AS actor1, a2.name AS actor2
+            """
         with self.driver.session() as session:
-            results = session.run(query)
-            edges = [(record["actor1"], record["actor2"]) for record in results]
-            return edges
+            for record in session.run(query):
+                yield record["actor1"], record["actor2"]
 
 
 ##################################################
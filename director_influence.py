@@ -0,0 +1,54 @@
+"""
+Similarité de genres entre réalisateurs, calculée en NumPy.
+
+Chaque réalisateur est représenté par un vecteur binaire de genres (matrice réalisateurs x genres).
+Les recouvrements sont obtenus par produits matriciels par blocs de lignes, ce qui borne la
+mémoire à chunk_size x nb_réalisateurs au lieu de nb_réalisateurs².
+"""
+import numpy as np
+
+# Seuil par défaut de chaque mesure : plus de 2 genres communs, ou plus de la moitié des genres
+DEFAULT_THRESHOLDS = {"overlap": 2, "jaccard": 0.5}
+MEASURES = tuple(DEFAULT_THRESHOLDS)
+
+
+def genre_matrix(director_genres):
+    """{réalisateur: [genres]} -> (noms, matrice booléenne réalisateurs x genres)."""
+    names = sorted(director_genres)
+    genres = sorted({g for gs in director_genres.values() for g in gs})
+    genre_index = {g: i for i, g in enumerate(genres)}
+    matrix = np.zeros((len(names), len(genres)), dtype=np.float32)
+    for row, name in enumerate(names):
+        for g in director_genres[name]:
+            matrix[row, genre_index[g]] = 1
+    return names, matrix
+
+
+def similar_director_pairs(director_genres, threshold=None, measure="overlap", chunk_size=1024):
+    """
+    Génère les paires (d1, d2, similarité) avec d1 < d2 dont la similarité dépasse
+    strictement `threshold` (par défaut DEFAULT_THRESHOLDS[measure]).
+    measure : "overlap" (nombre de genres communs) ou "jaccard" (seuil dans [0, 1)).
+    """
+    if measure not in MEASURES:
+        raise ValueError(f"Mesure inconnue : {measure} (attendu : {', '.join(MEASURES)})")
+    if threshold is None:
+        threshold = DEFAULT_THRESHOLDS[measure]
+    if measure == "jaccard" and not 0 <= threshold < 1:
+        raise ValueError(f"Seuil Jaccard hors de [0, 1) : {threshold}")
+    names, matrix = genre_matrix(director_genres)
+    sizes = matrix.sum(axis=1, dtype=np.float64)
+    for start in range(0, len(names), chunk_size):
+        block = matrix[start:start + chunk_size]
+        # Produit en float32 (entiers exacts) ; division Jaccard en float64
+        overlap = (block @ matrix.T).astype(np.float64)
+        if measure == "jaccard":
+            union = sizes[start:start + chunk_size, None] + sizes[None, :] - overlap
+            similarity = np.divide(overlap, union, out=np.zeros_like(overlap), where=union > 0)
+        else:
+            similarity = overlap
+        rows, cols = np.nonzero(similarity > threshold)
+        # Chaque paire une seule fois (i < j)
+        keep = cols > rows + start
+        for i, j in zip(rows[keep], cols[keep]):
+            yield names[start + i], names[j], float(similarity[i, j])
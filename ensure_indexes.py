@@ -0,0 +1,55 @@
+"""
+Création idempotente des index MongoDB et des contraintes / index Neo4j.
+Appelé par les scripts d'export et au démarrage de l'application ; peut aussi être lancé seul.
+Chaque base est traitée indépendamment : si l'une est injoignable, un avertissement est
+affiché et l'autre reste utilisable. La base en échec est retentée au plus toutes les
+ENSURE_INDEXES_RETRY secondes (pas à chaque rerun Streamlit).
+"""
+import os
+import threading
+import time
+
+ENSURE_INDEXES_RETRY = float(os.getenv("ENSURE_INDEXES_RETRY", "60"))
+
+_done = set()
+_failed_at = {}
+_lock = threading.Lock()
+
+
+def _ensure_mongo():
+    from db_mongo import ensure_mongo_indexes
+    ensure_mongo_indexes()
+
+
+def _ensure_neo4j():
+    from db_neo4j import Neo4jConnector
+    Neo4jConnector().ensure_constraints()
+
+
+STORES = {"mongodb": _ensure_mongo, "neo4j": _ensure_neo4j}
+
+
+def ensure_indexes(force=False):
+    """
+    Vérifie les index des deux bases, une seule fois par processus et par base (sauf force=True).
+    Retourne l'ensemble des bases dont les index sont vérifiés.
+    """
+    with _lock:
+        for name, ensure in STORES.items():
+            failed_at = _failed_at.get(name)
+            recently_failed = failed_at is not None and time.monotonic() - failed_at < ENSURE_INDEXES_RETRY
+            if not force and (name in _done or recently_failed):
+                continue
+            try:
+                ensure()
+            except Exception as e:
+                _failed_at[name] = time.monotonic()
+                print(f"⚠️ Index {name} non vérifiés (base injoignable ?) :", e)
+                continue
+            _failed_at.pop(name, None)
+            _done.add(name)
+        return set(_done)
+
+
+if __name__ == "__main__":
+    ensure_indexes(force=True)
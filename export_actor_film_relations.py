@@ -1,16 +1,18 @@
-from db_mongo import get_actor_film_relations
+from db_mongo import iter_actor_film_relations
 from db_neo4j import Neo4jConnector
+from ensure_indexes import ensure_indexes
+
+ensure_indexes()
 
-relations = get_actor_film_relations()
 neo4j = Neo4jConnector()
 
-nb_rels = 0
-for rel in relations:
-    try:
-        neo4j.create_actor_film_relation(rel["actor"], rel["film_id"])
-        nb_rels += 1
-    except Exception as e:
-        print("⚠️ Erreur relation :", rel, "->", e)
+try:
+    # Relations lues en flux : mémoire constante quelle que soit la taille du catalogue
+    nb_films = neo4j.create_actor_film_relations(iter_actor_film_relations())
+except Exception as e:
+    print("⚠️ Erreur relations acteur-film ->", e)
+    raise
+finally:
+    neo4j.close()
 
-neo4j.close()
-print(f"{nb_rels} relations acteur-film créées dans Neo4j.")
+print(f"Relations acteur-film créées dans Neo4j pour {nb_films} films.")
@@ -1,5 +1,8 @@
 from db_mongo import get_distinct_actors
 from db_neo4j import Neo4jConnector
+from ensure_indexes import ensure_indexes
+
+ensure_indexes()
 
 actors = get_distinct_actors()
 neo4j = Neo4jConnector()
@@ -1,7 +1,10 @@
-from db_mongo import get_director_film_relations
+from db_mongo import iter_director_film_relations
 from db_neo4j import Neo4jConnector
+from ensure_indexes import ensure_indexes
 
-relations = get_director_film_relations()
+ensure_indexes()
+
+relations = iter_director_film_relations()
 neo4j = Neo4jConnector()
 
 nb_nodes = 0
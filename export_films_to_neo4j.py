@@ -1,34 +1,50 @@
 from db_mongo import get_films_collection
 from db_neo4j import Neo4jConnector
+from ensure_indexes import ensure_indexes
 
-connector = Neo4jConnector()
-collection = get_films_collection()
-
-count = 0
-for film in collection.find():
-    try:
-        # Champs nécessaires (correspondance entre MongoDB et Neo4j)
-        cleaned_film = {
-            "id": str(film.get("_id")),  # _id vers id
-            "title": film.get("title"),
-            "year": film.get("year"),
-            "votes": int(film.get("Votes", 0)),
-            "revenue": float(film.get("Revenue (Millions)") or 0),
-            "rating": film.get("rating"),
-            "director": film.get("Director"),
-            "genre": film.get("genre")
-        }
-
-        # Vérifie qu'aucune valeur importante n'est manquante
-        if None in cleaned_film.values() or "" in cleaned_film.values():
-            print(f"⚠️ Film ignoré (champ manquant ou vide) : {film.get('title')}")
+
+def clean_film(film):
+    """
+    Convertit un document MongoDB en dictionnaire pour le noeud Film.
+    Retourne None si l'identifiant ou le titre manque ; les autres champs peuvent être null
+    (ex. un rating "unrated", converti en null par la migration).
+    """
+    # Champs nécessaires (correspondance entre MongoDB et Neo4j)
+    cleaned_film = {
+        "id": str(film.get("_id")),  # _id vers id
+        "title": film.get("title"),
+        "year": film.get("year"),
+        "votes": int(film.get("Votes") or 0),
+        "revenue": float(film.get("Revenue (Millions)") or 0),
+        "rating": film.get("rating"),
+        "director": film.get("Director"),
+        "genre": film.get("genre")
+    }
+
+    # Vérifie que l'identifiant et le titre sont présents
+    if film.get("_id") is None or not cleaned_film["title"]:
+        print(f"⚠️ Film ignoré (champ manquant ou vide) : {film.get('title')}")
+        return None
+    return cleaned_film
+
+
+def iter_cleaned_films(collection):
+    for film in collection.find():
+        try:
+            cleaned_film = clean_film(film)
+        except Exception as e:
+            print(f"Erreur lors du traitement du film {film.get('title')} : {e}")
             continue
+        if cleaned_film is not None:
+            yield cleaned_film
+
 
-        connector.create_film_node(cleaned_film)
-        count += 1
+if __name__ == "__main__":
+    ensure_indexes()
+    connector = Neo4jConnector()
+    collection = get_films_collection()
 
-    except Exception as e:
-        print(f"Erreur lors du traitement du film {film.get('title')} : {e}")
+    count = connector.create_film_nodes(iter_cleaned_films(collection))
 
-print(f"{count} films exportés vers Neo4j.")
-connector.close()
+    print(f"{count} films exportés vers Neo4j.")
+    connector.close()
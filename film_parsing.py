@@ -0,0 +1,33 @@
+"""
+Découpage des champs texte multi-valeurs des films (acteurs, réalisateurs, genres).
+Sans dépendance aux bases : partagé par db_mongo, la synchronisation et les outils Neo4j.
+"""
+import re
+
+
+def split_actors(actors_field):
+    """
+    Découpe la chaîne 'Actors' en liste de noms, en normalisant l'absence d'espace après la virgule.
+    """
+    if not actors_field:
+        return []
+    # Normaliser la chaîne : insérer un espace après chaque virgule si nécessaire
+    corrected = re.sub(r",(\S)", r", \1", actors_field)
+    # Découper la chaîne normalisée en fonction de ", "
+    return [actor.strip() for actor in corrected.split(", ") if actor.strip()]
+
+def split_directors(director_field):
+    """
+    Découpe la chaîne 'Director' en liste de noms (réalisateurs multiples séparés par des virgules).
+    """
+    if not director_field:
+        return []
+    return [name.strip() for name in director_field.split(",") if name.strip()]
+
+def split_genres(genre_field):
+    """
+    Découpe la chaîne 'genre' en liste de genres nettoyés.
+    """
+    if not genre_field:
+        return []
+    return [genre.strip() for genre in genre_field.split(",") if genre.strip()]
@@ -0,0 +1,188 @@
+"""
+Moteur de graphe en mémoire pour le graphe biparti (:Actor)-[:A_JOUE_DANS]->(:Film).
+
+Le graphe est chargé une fois depuis Neo4j dans des tableaux d'adjacence compacts au
+format CSR (indices entiers NumPy), dans les deux sens : acteur -> films et film -> acteurs.
+Les parcours simples (co-acteurs, films des co-acteurs, films les plus connectés, paires
+de co-acteurs) sont alors résolus localement, sans aller-retour réseau.
+
+Le moteur est optionnel : tant qu'il n'est pas chargé (load_graph_engine()), les méthodes de
+Neo4jConnector interrogent Neo4j. Il retient la version du graphe acteurs-films (noeud
+(:Meta {name: 'ACTOR_GRAPH'}), incrémenté par chaque écriture de relations A_JOUE_DANS, y
+compris depuis un script d'export ou la synchronisation) : avant de répondre, la version
+est relue au plus toutes les GRAPH_ENGINE_VERSION_CHECK secondes et le moteur est rechargé
+(refresh_graph_engine()) si elle a changé.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+from query_cache import register_invalidation_hook
+
+GRAPH_ENGINE_VERSION_CHECK = float(os.getenv("GRAPH_ENGINE_VERSION_CHECK", "5"))
+
+_engine = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _csr(src, dst, n):
+    """Construit (ptr, indices) tels que les voisins de i soient indices[ptr[i]:ptr[i + 1]]."""
+    order = np.argsort(src, kind="stable")
+    ptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=ptr[1:])
+    return ptr, dst[order].astype(np.int32)
+
+
+class ActorFilmGraph:
+    def __init__(self, actor_names, film_titles, film_years, edge_actor, edge_film, version=None):
+        self.version = version
+        self.actor_names = actor_names
+        self.actor_index = {name: i for i, name in enumerate(actor_names)}
+        self.film_titles = film_titles
+        self.film_years = film_years
+        edge_actor = np.asarray(edge_actor, dtype=np.int32)
+        edge_film = np.asarray(edge_film, dtype=np.int32)
+        self.actor_ptr, self.actor_films = _csr(edge_actor, edge_film, len(actor_names))
+        self.film_ptr, self.film_actors = _csr(edge_film, edge_actor, len(film_titles))
+
+    @classmethod
+    def from_neo4j(cls, driver):
+        """Charge toutes les relations A_JOUE_DANS en un seul parcours de résultats."""
+        from db_neo4j import read_actor_graph_version
+
+        # Version lue avant le chargement : une écriture concurrente sera vue au prochain contrôle
+        version = read_actor_graph_version(driver)
+        query = """
+        MATCH (a:Actor)-[:A_JOUE_DANS]->(f:Film)
+        RETURN a.name AS actor, f.id AS film_id, f.title AS title, f.year AS year
+        """
+        actor_index, film_index = {}, {}
+        actor_names, film_titles, film_years = [], [], []
+        edge_actor, edge_film = [], []
+        with driver.session() as session:
+            for record in session.run(query):
+                a = actor_index.get(record["actor"])
+                if a is None:
+                    a = actor_index[record["actor"]] = len(actor_names)
+                    actor_names.append(record["actor"])
+                f = film_index.get(record["film_id"])
+                if f is None:
+                    f = film_index[record["film_id"]] = len(film_titles)
+                    film_titles.append(record["title"])
+                    film_years.append(record["year"])
+                edge_actor.append(a)
+                edge_film.append(f)
+        graph = cls(actor_names, film_titles, film_years, edge_actor, edge_film, version)
+        print(f"Moteur de graphe chargé : {len(actor_names)} acteurs, {len(film_titles)} films, {len(edge_actor)} relations.")
+        return graph
+
+    def films_of(self, actor):
+        return self.actor_films[self.actor_ptr[actor]:self.actor_ptr[actor + 1]]
+
+    def actors_of(self, film):
+        return self.film_actors[self.film_ptr[film]:self.film_ptr[film + 1]]
+
+    def _coactor_indices(self, actor_name):
+        actor = self.actor_index.get(actor_name)
+        if actor is None:
+            return np.empty(0, dtype=np.int32)
+        films = self.films_of(actor)
+        if len(films) == 0:
+            return np.empty(0, dtype=np.int32)
+        actors = np.unique(np.concatenate([self.actors_of(f) for f in films]))
+        return actors[actors != actor]
+
+    def coactors_of(self, actor_name):
+        return [self.actor_names[i] for i in self._coactor_indices(actor_name)]
+
+    def films_of_coactors(self, actor_name):
+        coactors = self._coactor_indices(actor_name)
+        if len(coactors) == 0:
+            return []
+        films = np.unique(np.concatenate([self.films_of(a) for a in coactors]))
+        rows = {(self.film_titles[f], self.film_years[f]) for f in films}
+        ordered = sorted(rows, key=lambda r: (r[1] is not None, r[1] or 0), reverse=True)
+        return [{"title": title, "year": year} for title, year in ordered]
+
+    def most_connected_films(self, limit=10):
+        """Films ayant le plus d'acteurs qui jouent aussi dans un autre film."""
+        n_films = len(self.film_titles)
+        if n_films == 0:
+            return []
+        actor_degree = np.diff(self.actor_ptr)
+        film_of_edge = np.repeat(np.arange(n_films), np.diff(self.film_ptr))
+        shared = np.bincount(film_of_edge, weights=actor_degree[self.film_actors] >= 2, minlength=n_films)
+        top = np.argsort(-shared, kind="stable")[:limit]
+        return [self.film_titles[f] for f in top if shared[f] > 0]
+
+    def coactor_pairs(self):
+        """Paires distinctes (acteur1, acteur2) avec acteur1 < acteur2 ayant joué ensemble."""
+        pairs = set()
+        for film in range(len(self.film_titles)):
+            names = sorted(self.actor_names[a] for a in self.actors_of(film))
+            for i, a1 in enumerate(names):
+                for a2 in names[i + 1:]:
+                    pairs.add((a1, a2))
+        return list(pairs)
+
+
+def load_graph_engine(driver=None):
+    """Charge (ou recharge) le moteur de graphe en mémoire et le retourne."""
+    global _engine, _checked_at
+    if driver is None:
+        from db_neo4j import get_neo4j_driver
+        driver = get_neo4j_driver()
+    graph = ActorFilmGraph.from_neo4j(driver)
+    with _lock:
+        _engine = graph
+        _checked_at = time.monotonic()
+    return graph
+
+
+def _version_changed():
+    """Relit la version du graphe (au plus une fois par intervalle) et la compare à celle du moteur."""
+    global _checked_at
+    now = time.monotonic()
+    if now - _checked_at < GRAPH_ENGINE_VERSION_CHECK:
+        return False
+    _checked_at = now
+    from db_neo4j import read_actor_graph_version
+    try:
+        return read_actor_graph_version() != _engine.version
+    except Exception as e:
+        print("Version du graphe illisible, moteur conservé :", e)
+        return False
+
+
+def get_loaded_graph_engine():
+    """Retourne le moteur s'il a été chargé (rechargé si le graphe a changé), sinon None."""
+    if _engine is None:
+        return None
+    if _version_changed():
+        refresh_graph_engine()
+    return _engine
+
+
+def refresh_graph_engine():
+    """Recharge immédiatement le moteur s'il était chargé."""
+    if _engine is not None:
+        load_graph_engine()
+
+
+def _check_soon():
+    # Une écriture a eu lieu (dans ce processus ou vue via la version des données) :
+    # la version du graphe sera relue au prochain usage, sans attendre l'intervalle.
+    global _checked_at
+    _checked_at = 0.0
+
+
+def unload_graph_engine():
+    global _engine
+    with _lock:
+        _engine = None
+
+
+register_invalidation_hook(_check_soon)
@@ -1,14 +1,31 @@
+import io
+import os
 import networkx as nx
 from pyvis.network import Network
 import streamlit.components.v1 as components
-from db_neo4j import Neo4jConnector
+from db_neo4j import Neo4jConnector, ShortestPathTimeout
+from query_cache import cached_query
 import streamlit as st
-import tempfile
-import os
-from networkx.algorithms.community import greedy_modularity_communities
 
+# Rendu des graphes en mémoire : le HTML pyvis est généré sans passer par le disque (plus de fichiers
+# partagés entre sessions) et mis en cache par requête et paramètres. Un affichage répété ne relance
+# ni la requête, ni la mise en page, ni la génération du HTML ; les écritures vident ce cache.
+GRAPH_RENDER_CACHE_TTL = int(os.getenv("GRAPH_RENDER_CACHE_TTL", "600"))
+GRAPH_RENDER_CACHE_MAXSIZE = int(os.getenv("GRAPH_RENDER_CACHE_MAXSIZE", "16"))
 
-def draw_top_actor_graph():
+
+def cached_render(func):
+    """Cache borné du HTML rendu, indexé par les paramètres de la fonction de rendu."""
+    return cached_query(ttl=GRAPH_RENDER_CACHE_TTL, maxsize=GRAPH_RENDER_CACHE_MAXSIZE)(func)
+
+
+def render_html(net):
+    """HTML complet du graphe pyvis, généré en mémoire."""
+    return net.generate_html(notebook=False)
+
+
+@cached_render
+def _render_top_actor_graph():
     connector = Neo4jConnector()
     query = """
     MATCH (a:Actor)-[:A_JOUE_DANS]->(f:Film)
@@ -29,12 +46,16 @@ def draw_top_actor_graph():
 
     net = Network(height="600px", width="100%", bgcolor="#222", font_color="white")
     net.from_nx(G)
-    net.save_graph("top_actor_graph.html")
-
-    components.html(open("top_actor_graph.html", "r", encoding="utf-8").read(), height=600)
     connector.close()
+    return render_html(net)
 
-def afficher_graphe_acteurs_films():
+
+def draw_top_actor_graph():
+    components.html(_render_top_actor_graph(), height=600)
+
+
+@cached_render
+def _render_graphe_acteurs_films():
     connector = Neo4jConnector()
     query = """
     MATCH (a:Actor)-[:A_JOUE_DANS]->(f:Film)
@@ -49,21 +70,30 @@ def afficher_graphe_acteurs_films():
             G.add_node(record["acteur"], label=record["acteur"], color='lightblue')
             G.add_node(record["film"], label=record["film"], color='orange')
             G.add_edge(record["acteur"], record["film"])
-    
+
     net = Network(notebook=False)
     net.from_nx(G)
-    net.save_graph("graph.html")
-
-    components.html(open("graph.html", "r", encoding="utf-8").read(), height=600)
     connector.close()
+    return render_html(net)
 
-def draw_coactors_graph(actor_name="Anne Hathaway"):
+
+def afficher_graphe_acteurs_films():
+    components.html(_render_graphe_acteurs_films(), height=600)
+
+
+@cached_render
+def _render_coactors_graph(actor_name):
     connector = Neo4jConnector()
     query = """
     MATCH (a:Actor {name: $name})-[:A_JOUE_DANS]->(f:Film)<-[:A_JOUE_DANS]-(co:Actor)
     WHERE co.name <> $name
     RETURN DISTINCT a.name AS main_actor, co.name AS co_actor
     """
+    if connector.has_coactor_projection():
+        query = """
+        MATCH (a:Actor {name: $name})-[:CO_JOUE]-(co:Actor)
+        RETURN a.name AS main_actor, co.name AS co_actor
+        """
     G = nx.Graph()
 
     with connector.driver.session() as session:
@@ -77,11 +107,16 @@ def draw_coactors_graph(actor_name="Anne Hathaway"):
 
     net = Network(height="600px", width="100%", bgcolor="#222", font_color="white")
     net.from_nx(G)
-    net.save_graph("coactors_graph.html")
-    components.html(open("coactors_graph.html", "r", encoding="utf-8").read(), height=600)
     connector.close()
+    return render_html(net)
 
-def draw_actor_highest_revenue_graph():
+
+def draw_coactors_graph(actor_name="Anne Hathaway"):
+    components.html(_render_coactors_graph(actor_name), height=600)
+
+
+@cached_render
+def _render_actor_highest_revenue_graph():
     connector = Neo4jConnector()
     query = """
     MATCH (a:Actor)-[:A_JOUE_DANS]->(f:Film)
@@ -106,13 +141,17 @@ def draw_actor_highest_revenue_graph():
 
     net = Network(height="600px", width="100%", bgcolor="#222", font_color="white")
     net.from_nx(G)
-    net.save_graph("actor_revenue_graph.html")
-    components.html(open("actor_revenue_graph.html", "r", encoding="utf-8").read(), height=600)
     connector.close()
+    return render_html(net)
+
+
+def draw_actor_highest_revenue_graph():
+    components.html(_render_actor_highest_revenue_graph(), height=600)
+
 
 def draw_votes_avg_graph(data, moyenne):
+    """Diagramme des votes en PNG, renvoyé en octets (utilisable directement par st.image)."""
     import matplotlib.pyplot as plt
-    import os
 
     fig, ax = plt.subplots(figsize=(10, 5))
 
@@ -128,13 +167,16 @@ def draw_votes_avg_graph(data, moyenne):
     plt.xticks(rotation=45, ha="right")
     plt.tight_layout()
 
-    file_path = "avg_votes_graph.png"
-    fig.savefig(file_path)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
     plt.close(fig)
 
-    return file_path
+    return buffer.getvalue()
+
 
+@cached_render
 def draw_most_common_genre_graph(genre, occurrences):
+    """Renvoie le HTML du graphe (à passer à components.html)."""
     G = nx.Graph()
     G.add_node("Genre", label="🎭 Genre", color="gold")
     G.add_node(genre, label=f"{genre}\n🎬 {occurrences} films", color="lightblue")
@@ -142,11 +184,11 @@ def draw_most_common_genre_graph(genre, occurrences):
 
     net = Network(height="600px", width="100%", bgcolor="#111", font_color="white")
     net.from_nx(G)
-    net.save_graph("most_common_genre.html")
-    return "most_common_genre.html"
+    return render_html(net)
 
 
-def draw_coactors_films_graph(member_name):
+@cached_render
+def _render_coactors_films_graph(member_name):
     connector = Neo4jConnector()
     query = """
     MATCH (me:Actor {name: $name})-[:A_JOUE_DANS]->(:Film)<-[:A_JOUE_DANS]-(co:Actor)
@@ -154,6 +196,12 @@ def draw_coactors_films_graph(member_name):
     MATCH (co)-[:A_JOUE_DANS]->(f:Film)
     RETURN DISTINCT co.name AS coactor, f.title AS film
     """
+    if connector.has_coactor_projection():
+        query = """
+        MATCH (:Actor {name: $name})-[:CO_JOUE]-(co:Actor)
+        MATCH (co)-[:A_JOUE_DANS]->(f:Film)
+        RETURN DISTINCT co.name AS coactor, f.title AS film
+        """
     G = nx.Graph()
 
     with connector.driver.session() as session:
@@ -169,14 +217,16 @@ def draw_coactors_films_graph(member_name):
 
     net = Network(height="600px", width="100%", bgcolor="#222", font_color="white")
     net.from_nx(G)
-    file_path = "coactors_films_graph.html"
-    net.save_graph(file_path)
     connector.close()
+    return render_html(net)
 
-    components.html(open(file_path, "r", encoding="utf-8").read(), height=600)
 
+def draw_coactors_films_graph(member_name):
+    components.html(_render_coactors_films_graph(member_name), height=600)
 
-def draw_director_with_actors_graph(director_name):
+
+@cached_render
+def _render_director_with_actors_graph(director_name):
     connector = Neo4jConnector()
     query = """
     MATCH (r:Realisateur {name: $name})-[:A_REALISE]->(f:Film)<-[:A_JOUE_DANS]-(a:Actor)
@@ -200,12 +250,16 @@ def draw_director_with_actors_graph(director_name):
 
     net = Network(height="600px", width="100%", bgcolor="#111", font_color="white")
     net.from_nx(G)
-    net.save_graph("director_actors_graph.html")
     connector.close()
+    return render_html(net)
 
-    components.html(open("director_actors_graph.html", "r", encoding="utf-8").read(), height=600)
 
-def draw_shared_films_graph_only(film_titles):
+def draw_director_with_actors_graph(director_name):
+    components.html(_render_director_with_actors_graph(director_name), height=600)
+
+
+@cached_render
+def _render_shared_films_graph_only(film_titles):
     connector = Neo4jConnector()
     query = """
     MATCH (f1:Film)<-[:A_JOUE_DANS]-(a:Actor)-[:A_JOUE_DANS]->(f2:Film)
@@ -218,7 +272,7 @@ def draw_shared_films_graph_only(film_titles):
     G = nx.Graph()
 
     with connector.driver.session() as session:
-        results = session.run(query, titles=film_titles)
+        results = session.run(query, titles=list(film_titles))
         for record in results:
             f1 = record["film1"]
             f2 = record["film2"]
@@ -253,53 +307,41 @@ def draw_shared_films_graph_only(film_titles):
     }
     """)
 
-    net.save_graph("film_only_shared_graph.html")
     connector.close()
+    return render_html(net)
 
-    components.html(open("film_only_shared_graph.html", "r", encoding="utf-8").read(), height=650)
 
-def draw_film_recommendation_graph(actor_name):
-    import networkx as nx
-    from pyvis.network import Network
-    import streamlit.components.v1 as components
-    from db_neo4j import Neo4jConnector
+def draw_shared_films_graph_only(film_titles):
+    # Tuple pour que la sélection serve de clé de cache
+    components.html(_render_shared_films_graph_only(tuple(film_titles)), height=650)
 
+
+@cached_render
+def _render_film_recommendation_graph(actor_name):
     connector = Neo4jConnector()
 
-    query = """
-    MATCH (a:Actor {name: $name})-[:A_JOUE_DANS]->(f:Film)
-    UNWIND split(f.genre, ",") AS g
-    WITH a, collect(DISTINCT trim(g)) AS GenresPref
-    MATCH (rec:Film)
-    WHERE ANY(genre IN GenresPref WHERE rec.genre CONTAINS genre)
-      AND NOT (a)-[:A_JOUE_DANS]->(rec)
-    RETURN a.name AS acteur, GenresPref, rec.title AS film, rec.genre AS genres, rec.rating AS note
-    ORDER BY note DESC
-    LIMIT 1
-    """
+    # Même recommandation (mise en cache) que celle affichée par le bouton : pas de seconde requête
+    reco = connector.recommend_film_to_actor(actor_name)
 
     G = nx.Graph()
 
-    with connector.driver.session() as session:
-        result = session.run(query, name=actor_name).single()
-
-        if result:
-            acteur = result["acteur"]
-            genres = result["GenresPref"]
-            film = result["film"]
-            film_genres = result["genres"]
-            note = result["note"]
+    if reco:
+        acteur = actor_name
+        genres = connector.get_actor_genres(actor_name)
+        film = reco["titre"]
+        film_genres = reco["genres"] or ""
+        note = reco["note"]
 
-            G.add_node(acteur, label=acteur, color="gold")
+        G.add_node(acteur, label=acteur, color="gold")
 
-            for g in genres:
-                G.add_node(g, label=g, color="lightblue")
-                G.add_edge(acteur, g)
+        for g in genres:
+            G.add_node(g, label=g, color="lightblue")
+            G.add_edge(acteur, g)
 
-            G.add_node(film, label=f"{film}\n⭐ {note}", color="orange")
-            for g in genres:
-                if g in film_genres:
-                    G.add_edge(g, film)
+        G.add_node(film, label=f"{film}\n⭐ {note}", color="orange")
+        for g in genres:
+            if g in film_genres:
+                G.add_edge(g, film)
 
     connector.close()
 
@@ -321,19 +363,23 @@ def draw_film_recommendation_graph(actor_name):
       }
     }
     """)
-    net.save_graph("film_reco_graph.html")
-    components.html(open("film_reco_graph.html", "r", encoding="utf-8").read(), height=650)
+    return render_html(net)
+
 
-def draw_shortest_path_between_actors(actor1, actor2):
+def draw_film_recommendation_graph(actor_name):
+    components.html(_render_film_recommendation_graph(actor_name), height=650)
 
 
+@cached_render
+def _render_shortest_path_between_actors(actor1, actor2, max_hops=None):
+    """Renvoie (html, étapes du chemin, longueur), ou None si aucun chemin (ShortestPathTimeout non mis en cache)."""
     connector = Neo4jConnector()
-    path = connector.get_shortest_path_between_actors(actor1, actor2)
+    result = connector.find_shortest_path_between_actors(actor1, actor2, max_hops)
+    connector.close()
 
-    if not path:
-        st.warning(f"Aucun chemin trouvé entre **{actor1}** et **{actor2}**.")
-        connector.close()
-        return
+    if not result:
+        return None
+    path = result["path"]
 
     G = nx.Graph()
     nodes_list = []
@@ -353,9 +399,6 @@ def draw_shortest_path_between_actors(actor1, actor2):
         end = rel.end_node.get("name") or rel.end_node.get("title")
         G.add_edge(start, end)
 
-    st.success("Chemin trouvé !")
-    st.markdown(" → ".join(nodes_list))
-
     net = Network(height="600px", width="100%", bgcolor="#111", font_color="white")
     net.from_nx(G)
     net.set_options("""
@@ -375,36 +418,41 @@ def draw_shortest_path_between_actors(actor1, actor2):
     }
     """)
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmp_file:
-        net.save_graph(tmp_file.name)
-        html_content = open(tmp_file.name, 'r', encoding='utf-8').read()
-        components.html(html_content, height=600)
-    connector.close()
+    return render_html(net), nodes_list, result["length"]
 
 
-def draw_actor_communities_graph():
+def draw_shortest_path_between_actors(actor1, actor2, max_hops=None):
+    try:
+        rendered = _render_shortest_path_between_actors(actor1, actor2, max_hops)
+    except ShortestPathTimeout:
+        st.warning(f"Recherche du chemin entre **{actor1}** et **{actor2}** trop longue : réessayez plus tard.")
+        return
+
+    if not rendered:
+        st.warning(f"Aucun chemin trouvé entre **{actor1}** et **{actor2}**.")
+        return
+    html_content, nodes_list, length = rendered
+
+    st.success(f"Chemin trouvé ({length} relations) !")
+    st.markdown(" → ".join(nodes_list))
+    components.html(html_content, height=600)
+
 
+@cached_render
+def _render_actor_communities_graph():
+    """Renvoie (nb nœuds, nb arêtes, html) ; html vaut None si le graphe est vide."""
     connector = Neo4jConnector()
     edges = connector.get_actor_edges_for_communities()
 
     G = nx.Graph()
     G.add_edges_from(edges)
 
-    # 🔎 Debug rapide
-    st.write(f"Nombre de nœuds : {len(G.nodes())}")
-    st.write(f"Nombre d’arêtes : {len(G.edges())}")
-
-    # Cas vide : on affiche un message
     if len(G.nodes()) == 0:
-        st.warning("Aucun nœud trouvé. Vérifie que ta base Neo4j contient bien des relations entre acteurs.")
-        return
+        return 0, 0, None
 
-    # Détection des communautés (greedy)
-    communities = list(greedy_modularity_communities(G))
-    node_community = {}
-    for i, community in enumerate(communities):
-        for actor in community:
-            node_community[actor] = i
+    # Communautés (propagation de labels), stockées dans Neo4j et recalculées seulement si le graphe a changé
+    from communities import detect_actor_communities
+    node_community = detect_actor_communities(connector)
 
     # Création du graphe interactif PyVis
     net = Network(height="750px", width="100%", bgcolor="#ffffff", font_color="black")  # 👈 fond blanc forcé
@@ -415,16 +463,26 @@ def draw_actor_communities_graph():
 
     net.repulsion()
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmp_file:
-        path = tmp_file.name
-        net.save_graph(path)
-        with open(path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        components.html(html_content, height=800, scrolling=True)
-        os.unlink(path)
+    return len(G.nodes()), len(G.edges()), render_html(net)
 
 
-def draw_actors_with_common_movies(min_common=2):
+def draw_actor_communities_graph():
+    nb_nodes, nb_edges, html_content = _render_actor_communities_graph()
+
+    # 🔎 Debug rapide
+    st.write(f"Nombre de nœuds : {nb_nodes}")
+    st.write(f"Nombre d’arêtes : {nb_edges}")
+
+    # Cas vide : on affiche un message
+    if html_content is None:
+        st.warning("Aucun nœud trouvé. Vérifie que ta base Neo4j contient bien des relations entre acteurs.")
+        return
+
+    components.html(html_content, height=800, scrolling=True)
+
+
+@cached_render
+def _render_actors_with_common_movies(min_common):
     connector = Neo4jConnector()
     query = """
     MATCH (a1:Actor)-[:A_JOUE_DANS]->(f:Film)<-[:A_JOUE_DANS]-(a2:Actor)
@@ -433,6 +491,12 @@ def draw_actors_with_common_movies(min_common=2):
     WHERE common_movies >= $min_common
     RETURN a1.name AS actor1, a2.name AS actor2, common_movies AS nb, films
     """
+    if connector.has_coactor_projection():
+        query = """
+        MATCH (a1:Actor)-[c:CO_JOUE]->(a2:Actor)
+        WHERE c.count >= $min_common
+        RETURN a1.name AS actor1, a2.name AS actor2, c.count AS nb, c.films AS films
+        """
     G = nx.Graph()
 
     with connector.driver.session() as session:
@@ -447,7 +511,9 @@ def draw_actors_with_common_movies(min_common=2):
 
     net = Network(height="650px", width="100%", bgcolor="#111", font_color="white")
     net.from_nx(G)
-    net.save_graph("common_movies_actors_graph.html")
     connector.close()
+    return render_html(net)
 
-    components.html(open("common_movies_actors_graph.html", "r", encoding="utf-8").read(), height=650)
+
+def draw_actors_with_common_movies(min_common=2):
+    components.html(_render_actors_with_common_movies(min_common), height=650)
@@ -0,0 +1,19 @@
+import argparse
+
+from db_mongo import normalize_films_collection, restore_films_collection
+
+# Migration idempotente : types numériques, nulls au lieu de "", champ 'decade' et tableaux.
+# Les valeurs d'origine sont conservées dans 'raw_fields' (--rollback pour les remettre).
+parser = argparse.ArgumentParser(description="Migration du schéma de la collection films")
+parser.add_argument("--new-only", action="store_true",
+                    help="ne normalise que les films jamais migrés (nouvel import)")
+parser.add_argument("--rollback", action="store_true",
+                    help="annule la migration à partir de 'raw_fields'")
+args = parser.parse_args()
+
+if args.rollback:
+    count = restore_films_collection()
+    print(f"Migration annulée : {count} films restaurés.")
+else:
+    count = normalize_films_collection({"raw_fields": {"$exists": False}} if args.new_only else None)
+    print(f"Migration terminée : {count} films mis à jour.")
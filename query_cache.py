@@ -0,0 +1,166 @@
+"""
+Cache mémoire des résultats de requêtes du dashboard.
+
+Chaque fonction décorée par @cached_query a son propre TTLCache borné (durée de vie et
+taille par requête). Les méthodes d'écriture décorées par @invalidates_cache vident tous
+les caches après leur exécution, pour ne jamais servir un résultat périmé après un export.
+
+Les exports tournent dans d'autres processus que le dashboard : chaque base enregistre un
+compteur de version partagé (register_version_store). Les écritures l'incrémentent (au plus
+une fois par QUERY_CACHE_VERSION_CHECK secondes, le reste est différé) et @cached_query le
+relit au plus une fois par intervalle : un export vu d'un autre processus vide les caches
+en quelques secondes, au lieu d'attendre l'expiration du TTL.
+"""
+import atexit
+import functools
+import os
+import threading
+import time
+
+from cachetools import TTLCache
+from cachetools.keys import hashkey
+
+QUERY_CACHE_TTL = int(os.getenv("QUERY_CACHE_TTL", "600"))
+QUERY_CACHE_MAXSIZE = int(os.getenv("QUERY_CACHE_MAXSIZE", "64"))
+QUERY_CACHE_VERSION_CHECK = float(os.getenv("QUERY_CACHE_VERSION_CHECK", "5"))
+
+_caches = []
+_caches_lock = threading.Lock()
+_invalidation_hooks = []
+
+_version_stores = []   # [(read, bump)] : compteurs de version partagés entre processus
+_seen_versions = {}    # indice du compteur -> dernière version vue par ce processus
+_version_lock = threading.Lock()
+_last_check = 0.0
+_last_bump = 0.0
+_bump_pending = False
+
+
+def cached_query(ttl=None, maxsize=None, method=False):
+    """
+    Met en cache le résultat d'une requête de lecture, indexé par ses arguments.
+    Avec method=True, `self` est exclu de la clé (un Neo4jConnector est créé à chaque clic).
+    """
+    def decorator(func):
+        cache = TTLCache(maxsize or QUERY_CACHE_MAXSIZE, ttl or QUERY_CACHE_TTL)
+        lock = threading.Lock()
+        with _caches_lock:
+            _caches.append((cache, lock))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            check_data_version()
+            key = hashkey(*(args[1:] if method else args), **kwargs)
+            with lock:
+                if key in cache:
+                    return cache[key]
+            value = func(*args, **kwargs)
+            with lock:
+                cache[key] = value
+            return value
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+
+def register_invalidation_hook(hook):
+    """Enregistre une fonction appelée à chaque invalidation (ex. données dérivées en mémoire)."""
+    _invalidation_hooks.append(hook)
+
+
+def invalidate_all():
+    """Vide tous les caches de requêtes et prévient les hooks enregistrés."""
+    with _caches_lock:
+        caches = list(_caches)
+    for cache, lock in caches:
+        with lock:
+            cache.clear()
+    for hook in list(_invalidation_hooks):
+        hook()
+
+
+def register_version_store(read, bump):
+    """
+    Enregistre un compteur de version partagé (document MongoDB, noeud Neo4j, ...).
+    read() retourne la version courante, bump() l'incrémente et retourne la nouvelle.
+    """
+    _version_stores.append((read, bump))
+    # Enregistré après la fermeture du client de la base : exécuté avant elle à la sortie
+    atexit.register(flush_data_version)
+
+
+def _bump_versions():
+    global _bump_pending, _last_bump
+    with _version_lock:
+        _bump_pending = False
+        _last_bump = time.monotonic()
+    for index, (_, bump) in enumerate(list(_version_stores)):
+        try:
+            _seen_versions[index] = bump()
+        except Exception as e:
+            print("Version des données non incrémentée :", e)
+
+
+def _signal_write():
+    """Incrémente les versions partagées, au plus une fois par intervalle (sinon différé)."""
+    global _bump_pending
+    with _version_lock:
+        due = time.monotonic() - _last_bump >= QUERY_CACHE_VERSION_CHECK
+        if not due:
+            _bump_pending = True
+    if due:
+        _bump_versions()
+
+
+def flush_data_version():
+    """Publie une incrémentation différée (appelé à la sortie du processus)."""
+    if _bump_pending:
+        _bump_versions()
+
+
+def check_data_version():
+    """
+    Relit les versions partagées (au plus une fois par intervalle) et vide les caches si un
+    autre processus a écrit depuis la dernière lecture.
+    """
+    global _last_check
+    if not _version_stores:
+        return
+    with _version_lock:
+        now = time.monotonic()
+        if now - _last_check < QUERY_CACHE_VERSION_CHECK:
+            return
+        _last_check = now
+    flush_data_version()
+    changed = False
+    for index, (read, _) in enumerate(list(_version_stores)):
+        try:
+            version = read()
+        except Exception as e:
+            print("Version des données illisible :", e)
+            continue
+        if index in _seen_versions and _seen_versions[index] != version:
+            changed = True
+        _seen_versions[index] = version
+    if changed:
+        invalidate_all()
+
+
+def invalidates_cache(func):
+    """
+    Vide tous les caches après une écriture (export, création de relations, ...) et
+    incrémente les versions partagées pour prévenir les autres processus.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _signal_write()
+            invalidate_all()
+    return wrapper
@@ -0,0 +1,87 @@
+"""
+Moteur de recommandation de films par genres préférés d'un acteur.
+
+Précalculs (une seule lecture de Neo4j) :
+- listes inversées genre -> films notés, triés par note décroissante ;
+- films joués par chaque acteur.
+Pour un acteur, les listes de ses genres sont fusionnées paresseusement (heapq.merge, tas
+borné au nombre de genres) et l'on s'arrête dès que k films non joués sont trouvés.
+Le mode batch calcule les recommandations de tous les acteurs et les stocke dans Neo4j
+sous forme de relations (:Actor)-[:RECOMMANDE {rang}]->(:Film), avec la version du
+graphe acteurs-films et le k utilisés (ignorées à la lecture si elles sont périmées).
+"""
+import heapq
+
+from film_parsing import split_genres
+
+
+class GenreRecommender:
+    def __init__(self, films, actor_films):
+        """
+        films : {film_id: (titre, genre, note)} ; actor_films : {acteur: ensemble de film_id}.
+        """
+        self.films = films
+        self.actor_films = actor_films
+        self.film_genres = {film_id: split_genres(genre) for film_id, (_, genre, _) in films.items()}
+        postings = {}
+        for film_id, (_, _, rating) in films.items():
+            if rating is None:
+                continue
+            for genre in self.film_genres[film_id]:
+                postings.setdefault(genre, []).append((-rating, film_id))
+        for posting in postings.values():
+            posting.sort()
+        self.postings = postings
+
+    @classmethod
+    def from_neo4j(cls, driver):
+        films_query = "MATCH (f:Film) RETURN f.id AS id, f.title AS title, f.genre AS genre, f.rating AS rating"
+        actors_query = """
+        MATCH (a:Actor)-[:A_JOUE_DANS]->(f:Film)
+        RETURN a.name AS actor, collect(f.id) AS films
+        """
+        with driver.session() as session:
+            films = {r["id"]: (r["title"], r["genre"], r["rating"]) for r in session.run(films_query)}
+            actor_films = {r["actor"]: set(r["films"]) for r in session.run(actors_query)}
+        print(f"Moteur de recommandation : {len(films)} films, {len(actor_films)} acteurs.")
+        return cls(films, actor_films)
+
+    def actor_genres(self, actor_name):
+        genres = set()
+        for film_id in self.actor_films.get(actor_name, ()):
+            genres.update(self.film_genres.get(film_id, ()))
+        return sorted(genres)
+
+    def recommend(self, actor_name, k=5):
+        """Top k (film_id, note) parmi les films des genres préférés, hors films joués."""
+        played = self.actor_films.get(actor_name)
+        if not played:
+            return []
+        merged = heapq.merge(*(self.postings.get(g, []) for g in self.actor_genres(actor_name)))
+        results, seen = [], set()
+        for neg_rating, film_id in merged:
+            if film_id in played or film_id in seen:
+                continue
+            seen.add(film_id)
+            results.append((film_id, -neg_rating))
+            if len(results) == k:
+                break
+        return results
+
+    def recommend_all(self, k=5):
+        """Mode batch : lignes {actor, film_id, rang} pour tous les acteurs."""
+        for actor_name in self.actor_films:
+            for rang, (film_id, _) in enumerate(self.recommend(actor_name, k), start=1):
+                yield {"actor": actor_name, "film_id": film_id, "rang": rang}
+
+
+if __name__ == "__main__":
+    from db_neo4j import Neo4jConnector
+
+    connector = Neo4jConnector()
+    # Version lue avant le calcul : une écriture concurrente rendra les recommandations périmées
+    graph_version = connector.get_actor_graph_version()
+    recommender = GenreRecommender.from_neo4j(connector.driver)
+    count = connector.store_recommendations(recommender.recommend_all(k=5), graph_version, k=5)
+    connector.close()
+    print(f"{count} recommandations stockées dans Neo4j.")
@@ -0,0 +1,255 @@
+"""
+Synchronisation MongoDB -> Neo4j en une seule passe.
+
+La collection films est lue une seule fois avec un curseur ; pour chaque document on dérive
+le noeud Film, ses acteurs, ses réalisateurs, ses genres et les relations
+A_JOUE_DANS / A_REALISE / A_POUR_GENRE.
+Les paquets passent par une file bornée vers un écrivain Neo4j qui écrit par lots :
+la mémoire reste constante quelle que soit la taille de la collection.
+
+Mode incrémental (--incremental) : une empreinte (hash) du contenu de chaque film est
+conservée dans un fichier de checkpoint local. Chaque lot validé est ajouté à un journal
+(une ligne JSON par lot), compacté dans le checkpoint en fin de synchronisation.
+Seuls les films nouveaux ou modifiés sont envoyés, une reprise après crash repart
+du dernier lot validé, et les films disparus de MongoDB sont supprimés de Neo4j.
+"""
+import argparse
+import hashlib
+import json
+import os
+import queue
+import threading
+
+from db_mongo import get_films_collection
+from db_neo4j import Neo4jConnector, NEO4J_BATCH_SIZE
+from ensure_indexes import ensure_indexes
+from export_films_to_neo4j import clean_film
+from film_parsing import split_actors, split_directors, split_genres
+
+SYNC_PROJECTION = {
+    "title": 1, "year": 1, "Votes": 1, "Revenue (Millions)": 1,
+    "rating": 1, "Director": 1, "genre": 1, "Actors": 1,
+    "actors": 1, "directors": 1, "genres": 1,
+}
+
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(__file__), ".sync_checkpoint.json")
+
+_END = object()
+
+
+def film_to_bundle(film):
+    """Convertit un document MongoDB en paquet {film, actors, directors, genres}, ou None si invalide."""
+    try:
+        cleaned_film = clean_film(film)
+    except Exception as e:
+        print(f"Erreur lors du traitement du film {film.get('title')} : {e}")
+        return None
+    if cleaned_film is None:
+        return None
+    return {
+        "film": cleaned_film,
+        # Tableaux matérialisés s'ils existent, sinon découpage des chaînes d'origine
+        "actors": film.get("actors") or split_actors(film.get("Actors", "")),
+        "directors": film.get("directors") or split_directors(film.get("Director", "")),
+        "genres": film.get("genres") or split_genres(film.get("genre", "")),
+    }
+
+
+def iter_bundles(cursor):
+    for film in cursor:
+        bundle = film_to_bundle(film)
+        if bundle is not None:
+            yield bundle
+
+
+def bundle_hash(bundle):
+    """Empreinte stable du contenu synchronisé d'un film."""
+    payload = json.dumps(bundle, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def checkpoint_log_path(path):
+    return path + ".log"
+
+
+def load_checkpoint(path):
+    """Checkpoint compacté, puis lots du journal validés depuis (reprise après crash)."""
+    hashes = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            hashes = json.load(f).get("hashes", {})
+    log_path = checkpoint_log_path(path)
+    if os.path.exists(log_path):
+        with open(log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    hashes.update(json.loads(line))
+                except ValueError:
+                    # Dernière ligne tronquée par un crash : le lot n'est pas compté
+                    break
+    return hashes
+
+
+def append_checkpoint(path, entries):
+    """Ajoute les empreintes d'un lot validé au journal (coût proportionnel au lot)."""
+    with open(checkpoint_log_path(path), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entries) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def save_checkpoint(path, hashes):
+    """
+    Compaction : écriture atomique du checkpoint complet (fichier temporaire puis
+    remplacement), puis suppression du journal.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"hashes": hashes}, f)
+    os.replace(tmp_path, path)
+    log_path = checkpoint_log_path(path)
+    if os.path.exists(log_path):
+        os.remove(log_path)
+
+
+def _drain(q):
+    """Itère sur la file jusqu'au marqueur de fin."""
+    while True:
+        item = q.get()
+        if item is _END:
+            return
+        yield item
+
+
+def _run_pipeline(produce, write, queue_size):
+    """
+    Lance `produce()` (générateur de paquets) dans un thread lecteur et `write(paquets)`
+    dans le thread courant, reliés par une file bornée.
+    """
+    bundles = queue.Queue(maxsize=queue_size)
+    errors = []
+    stop = threading.Event()
+
+    def put(item):
+        # Attente bornée pour pouvoir abandonner si l'écrivain s'est arrêté
+        while not stop.is_set():
+            try:
+                bundles.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read():
+        try:
+            for bundle in produce():
+                if not put(bundle):
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            put(_END)
+
+    reader = threading.Thread(target=read, name="mongo-reader", daemon=True)
+    reader.start()
+    try:
+        count = write(_drain(bundles))
+    finally:
+        stop.set()
+        reader.join()
+    if errors:
+        raise errors[0]
+    return count
+
+
+def sync_all(batch_size=None, queue_size=None, query=None):
+    """
+    Lit la collection films une seule fois et écrit le graphe complet dans Neo4j.
+    `query` permet de restreindre la lecture à un sous-ensemble de films.
+    Retourne le nombre de films synchronisés.
+    """
+    batch_size = batch_size or NEO4J_BATCH_SIZE
+    collection = get_films_collection()
+    connector = Neo4jConnector()
+
+    def produce():
+        cursor = collection.find(query or {}, SYNC_PROJECTION, batch_size=batch_size)
+        return iter_bundles(cursor)
+
+    try:
+        return _run_pipeline(
+            produce,
+            lambda bundles: connector.sync_film_bundles(bundles, batch_size),
+            queue_size or 2 * batch_size,
+        )
+    finally:
+        connector.close()
+
+
+def sync_incremental(checkpoint_path=DEFAULT_CHECKPOINT, batch_size=None, queue_size=None):
+    """
+    N'envoie à Neo4j que les films nouveaux ou modifiés depuis le dernier checkpoint.
+    Les relations des films modifiés sont remplacées. Chaque lot validé est ajouté au journal
+    du checkpoint, ce qui rend la synchronisation reprenable après une erreur.
+    En fin de parcours complet, les films du checkpoint absents de MongoDB (ou devenus
+    invalides) sont supprimés de Neo4j, puis le journal est compacté dans le checkpoint.
+    Retourne le nombre de films synchronisés.
+    """
+    batch_size = batch_size or NEO4J_BATCH_SIZE
+    hashes = load_checkpoint(checkpoint_path)
+    collection = get_films_collection()
+    connector = Neo4jConnector()
+    seen = set()
+    print(f"Checkpoint : {len(hashes)} films déjà synchronisés ({checkpoint_path}).")
+
+    def produce():
+        cursor = collection.find({}, SYNC_PROJECTION, batch_size=batch_size)
+        for bundle in iter_bundles(cursor):
+            film_id = bundle["film"]["id"]
+            seen.add(film_id)
+            digest = bundle_hash(bundle)
+            if hashes.get(film_id) != digest:
+                bundle["hash"] = digest
+                yield bundle
+
+    def commit(batch):
+        entries = {bundle["film"]["id"]: bundle["hash"] for bundle in batch}
+        hashes.update(entries)
+        append_checkpoint(checkpoint_path, entries)
+
+    try:
+        count = _run_pipeline(
+            produce,
+            lambda bundles: connector.sync_film_bundles(
+                bundles, batch_size, replace_relations=True, on_batch=commit
+            ),
+            queue_size or 2 * batch_size,
+        )
+        # Garde-fou : une collection vide (mauvaise base ?) ne vide pas le graphe
+        deleted = [film_id for film_id in hashes if film_id not in seen] if seen else []
+        if deleted:
+            connector.delete_films(deleted, batch_size)
+            for film_id in deleted:
+                del hashes[film_id]
+        save_checkpoint(checkpoint_path, hashes)
+        return count
+    finally:
+        connector.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synchronisation MongoDB -> Neo4j")
+    parser.add_argument("--incremental", action="store_true",
+                        help="ne synchronise que les films nouveaux ou modifiés")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT,
+                        help="fichier de checkpoint du mode incrémental")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    ensure_indexes()
+
+    if args.incremental:
+        count = sync_incremental(args.checkpoint, args.batch_size)
+    else:
+        count = sync_all(args.batch_size)
+    print(f"{count} films (et leurs acteurs / réalisateurs) synchronisés vers Neo4j.")